@@ -1940,9 +1940,15 @@ async def get_schedule_generation_diagnostics(
     missing_subjects = []
     missing_teachers = []
     
+    # Bucket subjects by class and collect taught subject IDs in one pass each
+    subjects_by_class = defaultdict(list)
+    for subject in subjects:
+        subjects_by_class[subject.class_id].append(subject)
+    assigned_subject_ids = {ta.subject_id for ta in teacher_assignments if ta.is_active}
+    
     for cls in classes:
         # Get subjects for this class
-        class_subjects = [s for s in subjects if s.class_id == cls.id]
+        class_subjects = subjects_by_class.get(cls.id, [])
         total_subjects_needed += len(class_subjects)
         
         if not class_subjects:
@@ -1955,13 +1961,8 @@ async def get_schedule_generation_diagnostics(
         # Check if subjects have teachers
         subjects_without_teachers = []
         for subject in class_subjects:
-            # Find teachers assigned to this subject
-            assigned_teachers = [
-                ta for ta in teacher_assignments 
-                if ta.subject_id == subject.id and ta.is_active
-            ]
-            
-            if not assigned_teachers:
+            # Check for a teacher assigned to this subject
+            if subject.id not in assigned_subject_ids:
                 subjects_without_teachers.append({
                     "subject_id": subject.id,
                     "subject_name": subject.subject_name,
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Date, Numeric, ForeignKey, JSON, Time, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, Numeric, ForeignKey, JSON, Time, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class TimeSlot(BaseModel):
     __tablename__ = "time_slots"
+    __table_args__ = (
+        # Slot lookups by schedule and (day, period) during conflict detection
+        Index('ix_timeslot_schedule_day_period', 'schedule_id', 'day_of_week', 'period_number'),
+        {'extend_existing': True},
+    )
     
     # Time slot attributes
     schedule_id = Column(Integer, ForeignKey("schedules.id", ondelete="CASCADE"), nullable=False)
@@ -19,6 +24,12 @@ class TimeSlot(BaseModel):
     
 class ScheduleAssignment(BaseModel):
     __tablename__ = "schedule_assignments"
+    __table_args__ = (
+        # Teacher and room double-booking checks filter on (teacher|room, time slot)
+        Index('ix_assignment_teacher_slot', 'teacher_id', 'time_slot_id'),
+        Index('ix_assignment_room_slot', 'room', 'time_slot_id'),
+        {'extend_existing': True},
+    )
     
     # Schedule assignment attributes
     schedule_id = Column(Integer, ForeignKey("schedules.id", ondelete="CASCADE"), nullable=False)
@@ -31,6 +42,7 @@ class ScheduleAssignment(BaseModel):
     
     # Relationships
     schedule = relationship("Schedule")
+    # Load with selectinload(ScheduleAssignment.time_slot) when iterating assignments
     time_slot = relationship("TimeSlot")
     teacher = relationship("Teacher")
     subject = relationship("Subject")
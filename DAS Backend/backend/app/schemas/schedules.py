@@ -188,6 +188,9 @@ class ScheduleGenerationRequest(BaseModel):
     # Preview mode - if True, don't save to database, just return preview data
     preview_only: bool = False
     
+    # Skip the genetic optimization pass (its result is advisory only)
+    skip_optimization: bool = False
+    
     @validator('periods_per_day')
     def validate_periods_per_day(cls, v):
         if v < 1 or v > 10:
@@ -3,6 +3,7 @@ Constraint Solver for Schedule Validation
 Handles validation of scheduling constraints and conflict detection with priority levels
 """
 
+from collections import defaultdict
 from typing import Dict, List, Any, Optional, Tuple
 from ..models.teachers import Teacher
 from ..models.schedules import ScheduleConstraint
@@ -772,6 +773,34 @@ class ConstraintSolver:
         
         return True
     
+    def validate_batch(
+        self,
+        constraints: List[ScheduleConstraint],
+        schedule_assignments: List[Dict[str, Any]]
+    ) -> List[ViolationReport]:
+        """
+        Validate several constraints against the same assignments in one pass
+        
+        Assignments are grouped by subject once; a constraint with a subject_id
+        only scans that subject's assignments, since every check filters on it.
+        
+        Args:
+            constraints: Constraints to validate
+            schedule_assignments: List of schedule assignments to check against
+            
+        Returns:
+            List of violation reports, in constraint order
+        """
+        by_subject = defaultdict(list)
+        for assignment in schedule_assignments:
+            by_subject[assignment.get("subject_id")].append(assignment)
+        
+        violations = []
+        for constraint in constraints:
+            assignments = by_subject.get(constraint.subject_id, []) if constraint.subject_id else schedule_assignments
+            violations.extend(self.validate_constraint_with_priority(constraint, assignments))
+        return violations
+    
     def validate_all_constraints(
         self,
         constraints: List[ScheduleConstraint],
@@ -792,21 +821,16 @@ class ConstraintSolver:
         warnings = []
         info = []
         
-        for constraint in constraints:
-            if not constraint.is_active:
-                continue
-            
-            violations = self.validate_constraint_with_priority(constraint, schedule_assignments)
+        active_constraints = [constraint for constraint in constraints if constraint.is_active]
+        for violation in self.validate_batch(active_constraints, schedule_assignments):
+            all_violations.append(violation.to_dict())
             
-            for violation in violations:
-                all_violations.append(violation.to_dict())
-                
-                if violation.severity == "critical":
-                    critical_violations.append(violation.to_dict())
-                elif violation.severity == "warning":
-                    warnings.append(violation.to_dict())
-                else:
-                    info.append(violation.to_dict())
+            if violation.severity == "critical":
+                critical_violations.append(violation.to_dict())
+            elif violation.severity == "warning":
+                warnings.append(violation.to_dict())
+            else:
+                info.append(violation.to_dict())
         
         return {
             "is_valid": len(critical_violations) == 0,
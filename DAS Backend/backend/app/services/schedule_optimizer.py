@@ -5,6 +5,9 @@ Implements AI-like optimization for schedule generation
 
 import random
 import math
+import re
+import time as time_module
+from collections import Counter
 from typing import List, Dict, Tuple, Set, Optional, Any, cast
 from dataclasses import dataclass
 from datetime import time, timedelta
@@ -17,6 +20,9 @@ from ..models.teachers import Teacher, TeacherAssignment
 from ..schemas.schedules import DayOfWeek, ScheduleGenerationRequest
 from .constraint_solver import ConstraintSolver
 
+# First run of digits in a room name, e.g. "Room 12" -> 12
+_ROOM_NUMBER_RE = re.compile(r'\d+')
+
 @dataclass
 class OptimizationConstraint:
     """Represents a scheduling constraint"""
@@ -25,6 +31,25 @@ class OptimizationConstraint:
     parameters: Dict
     violation_penalty: float = 1.0
 
+@dataclass
+class AssignmentGene:
+    """Plain-attribute stand-in for a ScheduleAssignment inside the optimizer"""
+    id: int
+    time_slot_id: int
+    subject_id: Optional[int]
+    teacher_id: Optional[int]
+    class_id: Optional[int]
+    section: Optional[str] = None
+    schedule_id: Optional[int] = None
+    room: Optional[str] = None
+
+@dataclass
+class TimeSlotGene:
+    """Plain-attribute stand-in for a TimeSlot inside the optimizer"""
+    id: int
+    day_of_week: int
+    period_number: int
+
 @dataclass
 class ScheduleScore:
     """Represents the quality score of a schedule"""
@@ -64,11 +89,21 @@ class GeneticScheduleOptimizer:
         self.current_generation = 0
         self.diversity_threshold = 0.3
         self.stagnation_counter = 0
+        self.generations_run = 0
         
     def optimize_schedule(self, assignments: List[ScheduleAssignment], 
                          constraints: List[OptimizationConstraint],
-                         time_slots: List[TimeSlot]) -> List[ScheduleAssignment]:
-        """Main optimization method using genetic algorithm with adaptive parameters"""
+                         time_slots: List[TimeSlot],
+                         max_seconds: Optional[float] = None,
+                         patience: Optional[int] = None) -> List[ScheduleAssignment]:
+        """
+        Main optimization method using genetic algorithm with adaptive parameters
+        
+        Runs up to self.generations generations, stopping early on an excellent
+        score, after `patience` generations without improvement, or once
+        `max_seconds` have elapsed. The count actually run is in self.generations_run.
+        """
+        start_time = time_module.perf_counter()
         
         # Initialize population
         population = self._create_initial_population(assignments, time_slots)
@@ -76,9 +111,12 @@ class GeneticScheduleOptimizer:
         best_score = float('-inf')
         best_solution = assignments
         best_score_history = []
+        generations_without_improvement = 0
+        self.generations_run = 0
         
         for generation in range(self.generations):
             self.current_generation = generation
+            self.generations_run = generation + 1
             
             # Evaluate population
             scored_population = [(individual, self._evaluate_schedule(individual, constraints)) 
@@ -92,6 +130,9 @@ class GeneticScheduleOptimizer:
             if current_best[1].total_score > best_score:
                 best_score = current_best[1].total_score
                 best_solution = current_best[0]
+                generations_without_improvement = 0
+            else:
+                generations_without_improvement += 1
             
             best_score_history.append(best_score)
             
@@ -129,6 +170,12 @@ class GeneticScheduleOptimizer:
             # Early termination if excellent solution found
             if best_score > 0.98:  # 98% optimal
                 break
+            
+            # Early termination on convergence or time budget
+            if patience is not None and generations_without_improvement >= patience:
+                break
+            if max_seconds is not None and time_module.perf_counter() - start_time > max_seconds:
+                break
         
         return best_solution
     
@@ -408,8 +455,7 @@ class GeneticScheduleOptimizer:
         # Standard classrooms
         elif 'classroom' in room_name_lower or 'room' in room_name_lower:
             # Extract room number if available
-            import re
-            room_number_match = re.search(r'\d+', room_name)
+            room_number_match = _ROOM_NUMBER_RE.search(room_name)
             if room_number_match:
                 room_number = int(room_number_match.group())
                 # Larger room numbers typically indicate larger rooms
@@ -450,11 +496,7 @@ class GeneticScheduleOptimizer:
     def _check_teacher_workload(self, assignments: List[ScheduleAssignment], params: Dict) -> int:
         """Check teacher workload constraints"""
         violations = 0
-        teacher_loads = {}
-        
-        for assignment in assignments:
-            if assignment.teacher_id:
-                teacher_loads[assignment.teacher_id] = teacher_loads.get(assignment.teacher_id, 0) + 1
+        teacher_loads = Counter(assignment.teacher_id for assignment in assignments if assignment.teacher_id)
         
         max_load = params.get('max_periods_per_teacher', 25)
         for teacher_id, load in teacher_loads.items():
@@ -498,11 +540,7 @@ class GeneticScheduleOptimizer:
     # Scoring methods
     def _calculate_teacher_balance_score(self, assignments: List[ScheduleAssignment]) -> float:
         """Calculate how balanced teacher workloads are"""
-        teacher_loads = {}
-        
-        for assignment in assignments:
-            if assignment.teacher_id:
-                teacher_loads[assignment.teacher_id] = teacher_loads.get(assignment.teacher_id, 0) + 1
+        teacher_loads = Counter(assignment.teacher_id for assignment in assignments if assignment.teacher_id)
         
         if not teacher_loads:
             return 1.0
@@ -3,11 +3,30 @@ Advanced Schedule Generation Service
 Handles automatic schedule creation with conflict detection and optimization
 """
 
+import csv
+import json
+import logging
+import random
+import re
 import time
-from typing import List, Dict, Tuple, Optional, Set, Any
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import chain, islice, repeat
+from operator import attrgetter
+from typing import IO, Iterator, List, Dict, NamedTuple, Tuple, Optional, Set, Any
 from datetime import datetime, date, time as dt_time, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from io import StringIO
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import and_, or_, exists, insert
+
+# Faster JSON parsing for teacher free_time_slots
+try:
+    import orjson
+    _json_loads = orjson.loads
+    ORJSON_AVAILABLE = True
+except ImportError:
+    _json_loads = json.loads
+    ORJSON_AVAILABLE = False
 
 from ..models.schedules import Schedule, ScheduleAssignment, ScheduleConflict, ScheduleConstraint, TimeSlot, ScheduleGenerationHistory
 from ..models.academic import Class, Subject, AcademicYear
@@ -19,7 +38,9 @@ from ..schemas.schedules import (
 from ..services.telegram_service import telegram_service
 from ..services.teacher_availability_service import TeacherAvailabilityService
 from ..services.validation_service import ValidationService
-from ..services.schedule_optimizer import GeneticScheduleOptimizer, OptimizationConstraint
+from ..services.schedule_optimizer import (
+    GeneticScheduleOptimizer, OptimizationConstraint, AssignmentGene, TimeSlotGene
+)
 from ..services.constraint_solver import ConstraintSolver
 from ..core.exceptions import (
     ScheduleValidationError,
@@ -29,6 +50,133 @@ from ..core.exceptions import (
     InsufficientDataError
 )
 
+logger = logging.getLogger(__name__)
+
+# Arabic labels for the school week (Sunday-Thursday) and constraint priority levels 1-4
+_DAY_NAMES = ("الأحد", "الاثنين", "الثلاثاء", "الأربعاء", "الخميس")
+_PRIORITY_NAMES = ("", "منخفض", "متوسط", "عالي", "حرج")
+
+# Working-day name -> schedule day_of_week number
+_DAY_MAPPING = {
+    'sunday': 1, 'monday': 2, 'tuesday': 3,
+    'wednesday': 4, 'thursday': 5, 'friday': 6, 'saturday': 7
+}
+
+# Subject-name keyword -> curriculum category, in precedence order
+# (a name matching several categories takes the first one listed)
+_SUBJECT_KEYWORD_CATEGORIES = {
+    keyword: category
+    for category, keywords in (
+        ('core', ('math', 'arabic', 'english')),
+        ('science', ('science', 'biology', 'chemistry', 'physics')),
+        ('humanities', ('social', 'history', 'geography', 'civics')),
+        ('language', ('french', 'german', 'spanish')),
+        ('arts', ('art', 'music', 'physical', 'sports')),
+        ('religion', ('islamic', 'religion')),
+    )
+    for keyword in keywords
+}
+_ADVANCED_SCIENCE_KEYWORDS = ('chemistry', 'physics')
+
+# Teacher columns read during generation; the contact, address and note
+# text columns are left unloaded
+_TEACHER_SCHEDULING_COLUMNS = (
+    Teacher.id, Teacher.full_name, Teacher.is_active,
+    Teacher.qualifications, Teacher.experience, Teacher.free_time_slots,
+)
+
+# Teacher expertise scoring: years of experience, and qualification keywords
+# in precedence order (the first match sets the score)
+_EXPERIENCE_YEARS_RE = re.compile(r'(\d+)\s*years?', re.IGNORECASE)
+_QUALIFICATION_SCORES = (
+    ('phd', 0.2), ('doctorate', 0.2),
+    ('master', 0.15), ('ma', 0.15), ('ms', 0.15),
+    ('bachelor', 0.1), ('ba', 0.1), ('bs', 0.1),
+    ('diploma', 0.05),
+)
+
+# Seconds a memoized class/subject/teacher lookup stays valid on a service instance
+_LOOKUP_CACHE_TTL = 60.0
+
+# Rows per executemany when inserting generated schedule entries
+_INSERT_BATCH_SIZE = 10000
+
+# Columns echoed back to the client for each entry of a preview-only generation
+_PREVIEW_FIELDS = ('class_id', 'section', 'day_of_week', 'period_number', 'subject_id', 'teacher_id')
+_preview_getter = attrgetter(*_PREVIEW_FIELDS)
+
+
+class _GeneratedPeriod(NamedTuple):
+    """One generated period kept in memory until commit; the rows themselves
+    are bulk inserted, so no ORM Schedule object is built per period"""
+    class_id: int
+    section: str
+    day_of_week: int
+    period_number: int
+    subject_id: int
+    teacher_id: int
+
+
+@lru_cache(maxsize=4096)
+def _curriculum_periods(subject_name_lower: str, grade_level: str, grade_number: int) -> int:
+    """
+    Estimate required periods per week for a subject at a grade.
+    
+    Pure function of its arguments, so results are memoized across classes;
+    the subject name is passed lowercased so differently cased names share an entry.
+    """
+    # This would normally query a curriculum table with educational standards
+    # For now, we'll implement a more realistic estimation based on educational best practices
+    
+    category = next(
+        (category for keyword, category in _SUBJECT_KEYWORD_CATEGORIES.items() if keyword in subject_name_lower),
+        None
+    )
+    
+    # Core subjects typically get more periods
+    if category == 'core':
+        if grade_level == 'primary':
+            return 5 if grade_number <= 3 else 4
+        elif grade_level == 'intermediate':
+            return 4
+        else:  # secondary
+            return 5 if 'math' in subject_name_lower else 4
+    
+    # Science subjects
+    elif category == 'science':
+        if grade_level == 'primary':
+            return 2 if grade_number <= 3 else 3
+        elif grade_level == 'intermediate':
+            return 3
+        else:  # secondary
+            return 4 if any(advanced in subject_name_lower for advanced in _ADVANCED_SCIENCE_KEYWORDS) else 3
+    
+    # Social studies and humanities
+    elif category == 'humanities':
+        return 3 if grade_level == 'primary' else 2
+    
+    # Languages (other than Arabic and English)
+    elif category == 'language':
+        return 3
+    
+    # Arts, physical education, religious education and other subjects
+    else:
+        return 2
+
+
+def _schedule_csv_writer(output: Any, schedule_data: List[Dict]) -> csv.DictWriter:
+    """CSV writer for schedule rows: columns come from the first row, missing values
+    are blank and extra keys are ignored"""
+    return csv.DictWriter(output, fieldnames=list(schedule_data[0].keys()), restval="", extrasaction="ignore")
+
+
+class _EchoWriter:
+    """File-like object whose write() hands the formatted CSV line back to the caller"""
+    
+    def write(self, value: str) -> str:
+        return value
+
+
 class ScheduleGenerationService:
     """Advanced schedule generation with AI-like optimization"""
     
@@ -40,6 +188,13 @@ class ScheduleGenerationService:
         self.constraint_solver = ConstraintSolver(db)
         self.conflicts = []
         self.warnings = []
+        self._subject_teacher_index: Optional[Dict[int, List[int]]] = None  # subject_id -> active teacher IDs
+        self._assigned_by_slot: Dict[int, Set[int]] = defaultdict(set)  # time_slot_id -> assigned teacher IDs
+        self._rooms_by_slot: Dict[int, Set[str]] = defaultdict(set)  # time_slot_id -> rooms in use
+        self._teacher_load: Counter = Counter()  # teacher_id -> periods placed so far
+        self._expertise_cache: Dict[int, float] = {}  # teacher_id -> expertise score
+        self._availability_cache: Dict[int, List[dict]] = {}  # teacher_id -> parsed free_time_slots
+        self._lookup_cache: Dict[tuple, Tuple[float, list]] = {}  # lookup key -> (loaded_at, rows)
         self.generation_stats = {
             'periods_created': 0,
             'assignments_created': 0,
@@ -71,71 +226,75 @@ class ScheduleGenerationService:
             teachers: List of teachers
             validation_results: Optional validation results
         """
-        import json
+        # Debug-only report: skip the formatting, JSON parsing and queries entirely otherwise
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        
         from datetime import datetime
         
-        print("\n" + "="*80)
-        print("=== بيانات قاعدة البيانات المستخدمة ===")
-        print(f"التاريخ والوقت: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("="*80)
+        # Collect the report and log it in one call
+        lines = []
+        lines.append("\n" + "="*80)
+        lines.append("=== بيانات قاعدة البيانات المستخدمة ===")
+        lines.append(f"التاريخ والوقت: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append("="*80)
         
         # Section 1: Academic Year Info
-        print(f"\n📚 السنة الدراسية:")
+        lines.append(f"\n📚 السنة الدراسية:")
         academic_year = self.db.query(AcademicYear).filter(AcademicYear.id == academic_year_id).first()
         if academic_year:
-            print(f"  - المعرف: {academic_year.id}")
-            print(f"  - الاسم: {academic_year.year_name}")
-            print(f"  - نشطة: {'نعم' if academic_year.is_active else 'لا'}")
+            lines.append(f"  - المعرف: {academic_year.id}")
+            lines.append(f"  - الاسم: {academic_year.year_name}")
+            lines.append(f"  - نشطة: {'نعم' if academic_year.is_active else 'لا'}")
         else:
-            print(f"  - لم يتم العثور على السنة الدراسية (ID: {academic_year_id})")
+            lines.append(f"  - لم يتم العثور على السنة الدراسية (ID: {academic_year_id})")
         
         # Section 2: Classes
-        print(f"\n🏫 الصفوف (عدد: {len(classes)}):")
+        lines.append(f"\n🏫 الصفوف (عدد: {len(classes)}):")
         for cls in classes:
-            print(f"  - المعرف: {cls.id}, الاسم: الصف {cls.grade_number} {cls.grade_level}, الفترة: {cls.session_type}")
+            lines.append(f"  - المعرف: {cls.id}, الاسم: الصف {cls.grade_number} {cls.grade_level}, الفترة: {cls.session_type}")
         
         # Section 3: Subjects
-        print(f"\n📖 المواد (عدد: {len(subjects)}):")
+        lines.append(f"\n📖 المواد (عدد: {len(subjects)}):")
         for subject in subjects:
             weekly_hours = getattr(subject, 'weekly_hours', 0) or getattr(subject, 'periods_per_week', 0)
-            print(f"  - المعرف: {subject.id}, الاسم: {subject.subject_name}, الحصص المطلوبة: {weekly_hours}")
+            lines.append(f"  - المعرف: {subject.id}, الاسم: {subject.subject_name}, الحصص المطلوبة: {weekly_hours}")
         
         # Section 4: Teachers
-        print(f"\n👨‍🏫 المعلمين (عدد: {len(teachers)}):")
+        lines.append(f"\n👨‍🏫 المعلمين (عدد: {len(teachers)}):")
         for teacher in teachers:
-            print(f"\n  المعرف: {teacher.id}, الاسم: {teacher.full_name}")
+            lines.append(f"\n  المعرف: {teacher.id}, الاسم: {teacher.full_name}")
             
             # Parse and display free_time_slots
             try:
                 if teacher.free_time_slots:
-                    slots = json.loads(teacher.free_time_slots)
+                    slots = _json_loads(teacher.free_time_slots)
                     # Count free slots
                     free_count = sum(1 for s in slots if s.get('status') == 'free' or s.get('is_free', False))
                     assigned_count = sum(1 for s in slots if s.get('status') == 'assigned')
                     unavailable_count = sum(1 for s in slots if s.get('status') == 'unavailable')
                     
-                    print(f"    أوقات الفراغ: حرة={free_count}, مشغولة={assigned_count}, غير متاحة={unavailable_count}")
+                    lines.append(f"    أوقات الفراغ: حرة={free_count}, مشغولة={assigned_count}, غير متاحة={unavailable_count}")
                     
                     # Show free slots by day
-                    day_names = ["الأحد", "الاثنين", "الثلاثاء", "الأربعاء", "الخميس"]
                     for day_idx in range(5):
                         day_slots = [s for s in slots if s.get('day') == day_idx]
                         free_periods = [s.get('period') + 1 for s in day_slots if s.get('status') == 'free' or s.get('is_free', False)]
                         if free_periods:
-                            print(f"    - {day_names[day_idx]}: {free_periods}")
+                            lines.append(f"    - {_DAY_NAMES[day_idx]}: {free_periods}")
                 else:
-                    print("    أوقات الفراغ: غير محددة")
+                    lines.append("    أوقات الفراغ: غير محددة")
             except Exception as e:
-                print(f"    خطأ في قراءة أوقات الفراغ: {e}")
+                lines.append(f"    خطأ في قراءة أوقات الفراغ: {e}")
         
         # Section 5: Time Slots Available
-        print(f"\n⏰ الفترات الزمنية المتاحة:")
-        print(f"  - الأيام: الأحد، الاثنين، الثلاثاء، الأربعاء، الخميس (5 أيام)")
-        print(f"  - الحصص: 1-6 (6 حصص في اليوم)")
-        print(f"  - المجموع: 30 فترة زمنية في الأسبوع")
+        lines.append(f"\n⏰ الفترات الزمنية المتاحة:")
+        lines.append(f"  - الأيام: الأحد، الاثنين، الثلاثاء، الأربعاء، الخميس (5 أيام)")
+        lines.append(f"  - الحصص: 1-6 (6 حصص في اليوم)")
+        lines.append(f"  - المجموع: 30 فترة زمنية في الأسبوع")
         
         # Section 6: Active Constraints
-        print(f"\n⚠️ القيود النشطة:")
+        lines.append(f"\n⚠️ القيود النشطة:")
         try:
             constraints = self.db.query(ScheduleConstraint).filter(
                 ScheduleConstraint.academic_year_id == academic_year_id,
@@ -143,49 +302,52 @@ class ScheduleGenerationService:
             ).all()
             
             if constraints:
-                print(f"  (عدد: {len(constraints)})")
+                lines.append(f"  (عدد: {len(constraints)})")
                 for constraint in constraints:
-                    priority_names = {1: "منخفض", 2: "متوسط", 3: "عالي", 4: "حرج"}
-                    priority = priority_names.get(constraint.priority_level, str(constraint.priority_level))
-                    print(f"  - النوع: {constraint.constraint_type}, الأولوية: {priority}")
+                    level = constraint.priority_level
+                    priority = _PRIORITY_NAMES[level] if level in range(1, 5) else str(level)
+                    lines.append(f"  - النوع: {constraint.constraint_type}, الأولوية: {priority}")
                     if constraint.description:
-                        print(f"    الوصف: {constraint.description}")
+                        lines.append(f"    الوصف: {constraint.description}")
             else:
-                print("  - لا توجد قيود نشطة")
+                lines.append("  - لا توجد قيود نشطة")
         except Exception as e:
-            print(f"  - خطأ في قراءة القيود: {e}")
+            lines.append(f"  - خطأ في قراءة القيود: {e}")
         
         # Section 7: Validation Results
         if validation_results:
-            print(f"\n✅ نتائج التحقق:")
-            print(f"  - صالح: {'نعم' if validation_results.get('is_valid') else 'لا'}")
-            print(f"  - يمكن المتابعة: {'نعم' if validation_results.get('can_proceed') else 'لا'}")
+            lines.append(f"\n✅ نتائج التحقق:")
+            lines.append(f"  - صالح: {'نعم' if validation_results.get('is_valid') else 'لا'}")
+            lines.append(f"  - يمكن المتابعة: {'نعم' if validation_results.get('can_proceed') else 'لا'}")
             
             summary = validation_results.get('summary', {})
             if summary:
-                print(f"  - إجمالي المواد: {summary.get('total_subjects', 0)}")
-                print(f"  - المواد مع معلمين: {summary.get('subjects_with_teachers', 0)}")
-                print(f"  - المعلمين بأوقات كافية: {summary.get('teachers_with_sufficient_time', 0)}")
+                lines.append(f"  - إجمالي المواد: {summary.get('total_subjects', 0)}")
+                lines.append(f"  - المواد مع معلمين: {summary.get('subjects_with_teachers', 0)}")
+                lines.append(f"  - المعلمين بأوقات كافية: {summary.get('teachers_with_sufficient_time', 0)}")
             
             errors = validation_results.get('errors', [])
             if errors:
-                print(f"\n  ⚠️ الأخطاء ({len(errors)}):")
+                lines.append(f"\n  ⚠️ الأخطاء ({len(errors)}):")
                 for error in errors:
-                    print(f"    - {error}")
+                    lines.append(f"    - {error}")
             
             warnings = validation_results.get('warnings', [])
             if warnings:
-                print(f"\n  ⚠️ التحذيرات ({len(warnings)}):")
+                lines.append(f"\n  ⚠️ التحذيرات ({len(warnings)}):")
                 for warning in warnings:
-                    print(f"    - {warning}")
+                    lines.append(f"    - {warning}")
+        
+        lines.append("\n" + "="*80 + "\n")
         
-        print("\n" + "="*80 + "\n")
+        logger.debug("\n".join(lines))
     
     def _print_generated_schedule_markdown(
         self,
         schedule_entries: List[Schedule],
         class_info: Dict[str, any],
-        save_to_file: bool = False
+        save_to_file: bool = False,
+        save_flush: bool = False
     ):
         """
         Generate and print schedule in markdown table format
@@ -194,6 +356,7 @@ class ScheduleGenerationService:
             schedule_entries: List of schedule entries
             class_info: Class information dictionary
             save_to_file: Whether to save to file (default: False, just print)
+            save_flush: Whether to fsync the saved file to disk (default: False)
         """
         from datetime import datetime
         import os
@@ -208,47 +371,42 @@ class ScheduleGenerationService:
         markdown.append(f"\n**التاريخ:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         
         # Create schedule grid
-        day_names = ["الأحد", "الاثنين", "الثلاثاء", "الأربعاء", "الخميس"]
         periods = list(range(1, 7))  # 1-6
         
-        # Organize entries by day and period
-        schedule_grid = {}
-        for entry in schedule_entries:
-            key = (entry.day_of_week, entry.period_number)
-            schedule_grid[key] = entry
-        
-        # Get subject and teacher names
-        subject_cache = {}
-        teacher_cache = {}
-        
-        for entry in schedule_entries:
-            if entry.subject_id not in subject_cache:
-                subject = self.db.query(Subject).filter(Subject.id == entry.subject_id).first()
-                subject_cache[entry.subject_id] = subject.subject_name if subject else f"مادة {entry.subject_id}"
-            
-            if entry.teacher_id not in teacher_cache:
-                teacher = self.db.query(Teacher).filter(Teacher.id == entry.teacher_id).first()
-                teacher_cache[entry.teacher_id] = teacher.full_name if teacher else f"معلم {entry.teacher_id}"
+        # Get subject and teacher names - one query per entity type
+        subject_ids = {entry.subject_id for entry in schedule_entries}
+        teacher_ids = {entry.teacher_id for entry in schedule_entries}
+        subject_names = dict(
+            self.db.query(Subject.id, Subject.subject_name).filter(Subject.id.in_(subject_ids)).all()
+        )
+        teacher_names = dict(
+            self.db.query(Teacher.id, Teacher.full_name).filter(Teacher.id.in_(teacher_ids)).all()
+        )
+        subject_cache = {
+            subject_id: subject_names.get(subject_id, f"مادة {subject_id}") for subject_id in subject_ids
+        }
+        teacher_cache = {
+            teacher_id: teacher_names.get(teacher_id, f"معلم {teacher_id}") for teacher_id in teacher_ids
+        }
         
         # Build table header
-        markdown.append("| الحصة | " + " | ".join(day_names) + " |")
+        markdown.append("| الحصة | " + " | ".join(_DAY_NAMES) + " |")
         markdown.append("|-------|" + "|".join(["-------"] * 5) + "|")
         
+        # Fill the table cells [period][day] in one pass over the entries
+        cells = [["---"] * len(_DAY_NAMES) for _ in periods]
+        for entry in schedule_entries:
+            if 1 <= entry.period_number <= len(periods) and 1 <= entry.day_of_week <= len(_DAY_NAMES):
+                cells[entry.period_number - 1][entry.day_of_week - 1] = (
+                    f"**{subject_cache.get(entry.subject_id, '---')}**<br>"
+                    f"{teacher_cache.get(entry.teacher_id, '---')}"
+                )
+        
         # Build table rows
-        for period in periods:
-            row = [f"| {period} "]
-            for day_idx, day_name in enumerate(day_names, start=1):
-                key = (day_idx, period)
-                if key in schedule_grid:
-                    entry = schedule_grid[key]
-                    subject_name = subject_cache.get(entry.subject_id, "---")
-                    teacher_name = teacher_cache.get(entry.teacher_id, "---")
-                    cell = f"**{subject_name}**<br>{teacher_name}"
-                else:
-                    cell = "---"
-                row.append(f" {cell} ")
-            row.append("|")
-            markdown.append("|".join(row))
+        markdown.append("\n".join(
+            f"| {period} | " + " | ".join(row_cells) + " ||"
+            for period, row_cells in zip(periods, cells)
+        ))
         
         # Add summary section
         markdown.append("\n## ملخص الجدول\n")
@@ -258,19 +416,15 @@ class ScheduleGenerationService:
         unique_subjects = len(set(e.subject_id for e in schedule_entries))
         unique_teachers = len(set(e.teacher_id for e in schedule_entries))
         
-        # Check for conflicts
-        conflicts = []
-        teacher_schedule = {}
+        # Check for conflicts: every entry beyond the first in a teacher's slot
+        teacher_slots = defaultdict(list)
         for entry in schedule_entries:
-            key = (entry.teacher_id, entry.day_of_week, entry.period_number)
-            if key in teacher_schedule:
-                conflicts.append({
-                    'teacher_id': entry.teacher_id,
-                    'day': entry.day_of_week,
-                    'period': entry.period_number
-                })
-            else:
-                teacher_schedule[key] = entry
+            teacher_slots[(entry.teacher_id, entry.day_of_week, entry.period_number)].append(entry)
+        conflicts = [
+            {'teacher_id': teacher_id, 'day': day, 'period': period}
+            for (teacher_id, day, period), entries in teacher_slots.items()
+            for _ in entries[1:]
+        ]
         
         markdown.append(f"- **إجمالي الحصص:** {total_periods}")
         markdown.append(f"- **عدد المواد:** {unique_subjects}")
@@ -284,16 +438,14 @@ class ScheduleGenerationService:
             markdown.append("\n### ⚠️ التعارضات المكتشفة:\n")
             for conflict in conflicts:
                 teacher_name = teacher_cache.get(conflict['teacher_id'], f"معلم {conflict['teacher_id']}")
-                day_name = day_names[conflict['day'] - 1] if 1 <= conflict['day'] <= 5 else f"يوم {conflict['day']}"
+                day_name = _DAY_NAMES[conflict['day'] - 1] if 1 <= conflict['day'] <= 5 else f"يوم {conflict['day']}"
                 markdown.append(f"- المعلم **{teacher_name}** معين لأكثر من صف في {day_name} الحصة {conflict['period']}")
         
         # Join all markdown lines
         markdown_text = "\n".join(markdown)
         
-        # Print to console
-        print("\n" + "="*80)
-        print(markdown_text)
-        print("="*80 + "\n")
+        # Echo to the debug log; the markdown itself is still built for the saved file
+        logger.debug("\n%s\n%s\n%s\n", "="*80, markdown_text, "="*80)
         
         # Save to file if requested
         if save_to_file:
@@ -307,12 +459,15 @@ class ScheduleGenerationService:
                 filename = f"{output_dir}/{class_name.replace(' ', '_')}_{section}_{timestamp}.md"
                 
                 # Write to file
-                with open(filename, 'w', encoding='utf-8') as f:
+                with open(filename, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
                     f.write(markdown_text)
+                    if save_flush:
+                        f.flush()
+                        os.fsync(f.fileno())
                 
-                print(f"✅ تم حفظ الجدول في: {filename}")
+                logger.info("Saved generated schedule to %s", filename)
             except Exception as e:
-                print(f"⚠️ فشل حفظ الملف: {e}")
+                logger.warning("Failed to save generated schedule: %s", e)
         
         # Return validation status
         return len(conflicts) == 0
@@ -345,60 +500,70 @@ class ScheduleGenerationService:
                 f"عدد الحصص المُنشأة ({len(schedule_entries)}) لا يتطابق مع المتوقع ({expected_total_periods})"
             )
         
+        # Prefetch teacher names and subject details used by the checks below
+        teacher_names = dict(
+            self.db.query(Teacher.id, Teacher.full_name).filter(
+                Teacher.id.in_({entry.teacher_id for entry in schedule_entries})
+            ).all()
+        )
+        subject_details = {
+            subject_id: (subject_name, weekly_hours)
+            for subject_id, subject_name, weekly_hours in self.db.query(
+                Subject.id, Subject.subject_name, Subject.weekly_hours
+            ).filter(Subject.id.in_({entry.subject_id for entry in schedule_entries})).all()
+        }
+        
         # Check 2: Teacher conflicts (same teacher, same time)
-        teacher_schedule = {}
-        teacher_conflicts = []
+        teacher_slots = defaultdict(list)
         for entry in schedule_entries:
-            key = (entry.teacher_id, entry.day_of_week, entry.period_number)
-            if key in teacher_schedule:
-                teacher = self.db.query(Teacher).filter(Teacher.id == entry.teacher_id).first()
-                teacher_name = teacher.full_name if teacher else f"معلم {entry.teacher_id}"
+            teacher_slots[(entry.teacher_id, entry.day_of_week, entry.period_number)].append(entry)
+        teacher_conflicts = []
+        for (teacher_id, day, period), entries in teacher_slots.items():
+            if len(entries) < 2:
+                continue
+            teacher_name = teacher_names.get(teacher_id, f"معلم {teacher_id}")
+            for entry in entries[1:]:
                 teacher_conflicts.append({
                     'teacher': teacher_name,
-                    'day': entry.day_of_week,
-                    'period': entry.period_number,
-                    'classes': [teacher_schedule[key], entry.class_id]
+                    'day': day,
+                    'period': period,
+                    'classes': [entries[0].class_id, entry.class_id]
                 })
                 errors.append(
-                    f"تعارض: المعلم {teacher_name} معين لصفين في نفس الوقت (يوم {entry.day_of_week} حصة {entry.period_number})"
+                    f"تعارض: المعلم {teacher_name} معين لصفين في نفس الوقت (يوم {day} حصة {period})"
                 )
-            else:
-                teacher_schedule[key] = entry.class_id
         
         # Check 3: Subject weekly hours satisfaction
-        subject_hours = {}
-        for entry in schedule_entries:
-            key = (entry.class_id, entry.subject_id)
-            subject_hours[key] = subject_hours.get(key, 0) + 1
-        
+        subject_hours = Counter((entry.class_id, entry.subject_id) for entry in schedule_entries)
         for (class_id, subject_id), actual_hours in subject_hours.items():
-            subject = self.db.query(Subject).filter(Subject.id == subject_id).first()
-            if subject:
-                expected_hours = getattr(subject, 'weekly_hours', 0)
+            details = subject_details.get(subject_id)
+            if details:
+                subject_name, expected_hours = details
                 if expected_hours and actual_hours != expected_hours:
                     warnings.append(
-                        f"المادة {subject.subject_name} للصف {class_id}: حصص فعلية ({actual_hours}) != مطلوبة ({expected_hours})"
+                        f"المادة {subject_name} للصف {class_id}: حصص فعلية ({actual_hours}) != مطلوبة ({expected_hours})"
                     )
         
         # Check 4: Class double-booking
-        class_schedule = {}
-        class_conflicts = []
+        class_slots = defaultdict(list)
         for entry in schedule_entries:
-            key = (entry.class_id, entry.day_of_week, entry.period_number)
-            if key in class_schedule:
+            class_slots[(entry.class_id, entry.day_of_week, entry.period_number)].append(entry)
+        class_conflicts = []
+        for key, entries in class_slots.items():
+            class_id, day, period = key
+            for _ in entries[1:]:
                 errors.append(
-                    f"تعارض: الصف {entry.class_id} لديه حصتان في نفس الوقت (يوم {entry.day_of_week} حصة {entry.period_number})"
+                    f"تعارض: الصف {class_id} لديه حصتان في نفس الوقت (يوم {day} حصة {period})"
                 )
                 class_conflicts.append(key)
-            else:
-                class_schedule[key] = entry.id
         
         # Check 5: Teacher availability (within free_time_slots)
+        # Re-read the slots once per teacher, since they were just marked as assigned
+        self._load_availability_cache({entry.teacher_id for entry in schedule_entries})
         availability_violations = []
         for entry in schedule_entries:
             try:
-                availability = self.availability_service.get_teacher_availability(entry.teacher_id)
-                slots = availability.get('slots', [])
+                slots = self._availability_cache.get(entry.teacher_id, [])
                 
                 # Convert to 0-based indexing
                 day_idx = entry.day_of_week - 1
@@ -408,13 +573,12 @@ class ScheduleGenerationService:
                 if 0 <= slot_idx < len(slots):
                     slot = slots[slot_idx]
                     if slot.get('status') not in ['free', 'assigned']:
-                        teacher = self.db.query(Teacher).filter(Teacher.id == entry.teacher_id).first()
-                        teacher_name = teacher.full_name if teacher else f"معلم {entry.teacher_id}"
+                        teacher_name = teacher_names.get(entry.teacher_id, f"معلم {entry.teacher_id}")
                         availability_violations.append(
                             f"المعلم {teacher_name} معين في وقت غير متاح (يوم {entry.day_of_week} حصة {entry.period_number})"
                         )
             except Exception as e:
-                print(f"Error checking teacher availability: {e}")
+                logger.error("Error checking teacher availability: %s", e)
         
         if availability_violations:
             warnings.extend(availability_violations)
@@ -422,25 +586,24 @@ class ScheduleGenerationService:
         # Determine if valid
         is_valid = len(errors) == 0
         
-        # Print validation summary
-        print("\n" + "="*80)
-        print("=== نتيجة التحقق من صحة الجدول ===")
-        print(f"الحالة: {'✅ صالح' if is_valid else '❌ غير صالح'}")
-        print(f"إجمالي الحصص: {len(schedule_entries)}")
-        print(f"الأخطاء: {len(errors)}")
-        print(f"التحذيرات: {len(warnings)}")
-        
-        if errors:
-            print("\n❌ الأخطاء:")
-            for error in errors:
-                print(f"  - {error}")
-        
-        if warnings:
-            print("\n⚠️ التحذيرات:")
-            for warning in warnings:
-                print(f"  - {warning}")
-        
-        print("="*80 + "\n")
+        # Log validation summary
+        if logger.isEnabledFor(logging.DEBUG):
+            lines = [
+                "\n" + "="*80,
+                "=== نتيجة التحقق من صحة الجدول ===",
+                f"الحالة: {'✅ صالح' if is_valid else '❌ غير صالح'}",
+                f"إجمالي الحصص: {len(schedule_entries)}",
+                f"الأخطاء: {len(errors)}",
+                f"التحذيرات: {len(warnings)}",
+            ]
+            if errors:
+                lines.append("\n❌ الأخطاء:")
+                lines.extend(f"  - {error}" for error in errors)
+            if warnings:
+                lines.append("\n⚠️ التحذيرات:")
+                lines.extend(f"  - {warning}" for warning in warnings)
+            lines.append("="*80 + "\n")
+            logger.debug("\n".join(lines))
         
         return is_valid, errors, warnings
     
@@ -450,7 +613,8 @@ class ScheduleGenerationService:
         num_days: int,
         periods_per_day: int,
         class_id: int,
-        section: Optional[str] = None
+        section: Optional[str] = None,
+        busy_masks: Optional[Dict[int, int]] = None
     ) -> Tuple[List[List[Optional[Tuple[Subject, int]]]], Dict[int, Any]]:
         """
         Distribute subjects evenly across the week BASED ON TEACHER AVAILABILITY
@@ -463,33 +627,30 @@ class ScheduleGenerationService:
             periods_per_day: Number of periods per day (typically 6)
             class_id: Class ID for filtering teacher assignments
             section: Section number for filtering teacher assignments (None for all sections)
+            busy_masks: teacher_id -> bitmask of cells already taken by sections
+                generated earlier in the same run (bit day * periods_per_day + period)
             
         Returns:
             Tuple of:
             - 2D list representing the week's schedule [day][period] with (Subject, teacher_id) tuples
             - Dictionary mapping teacher_id to Teacher object
         """
-        import random
         import json
         from app.models.teachers import Teacher, TeacherAssignment
         
-        # Initialize empty schedule grid
-        schedule_grid = [[None for _ in range(periods_per_day)] for _ in range(num_days)]
+        # Initialize empty schedule grid, plus a parallel grid of placed subject IDs
+        # so neighbour checks compare ints instead of unpacking (subject, teacher) tuples
+        schedule_grid = [[None] * periods_per_day for _ in range(num_days)]
+        subject_id_grid = [[None] * periods_per_day for _ in range(num_days)]
         
         # Build list of subject slots - must fill exactly total_slots (30)
         total_slots = num_days * periods_per_day
-        subject_slots = []
         
-        # First, add all subjects according to their weekly_hours
-        for subject in subjects:
-            weekly_hours = getattr(subject, 'weekly_hours', 1)
-            if not weekly_hours or weekly_hours < 1:
-                weekly_hours = 1
-            
-            for _ in range(weekly_hours):
-                subject_slots.append(subject)
+        # Resolve each subject's weekly_hours once; the loops below index this map
+        subject_hours = {subject.id: getattr(subject, 'weekly_hours', 1) or 1 for subject in subjects}
         
-        total_hours = len(subject_slots)
+        # Each subject contributes weekly_hours slots (at least 1)
+        total_hours = sum(max(1, subject_hours[subject.id]) for subject in subjects)
         
         # Critical check: Must have EXACTLY total_slots periods
         if total_hours < total_slots:
@@ -500,16 +661,25 @@ class ScheduleGenerationService:
             )
         elif total_hours > total_slots:
             # Trim excess hours - take only what fits
-            print(f"⚠️ إجمالي الساعات ({total_hours}) يتجاوز المتاح ({total_slots}). سيتم استخدام {total_slots} حصة فقط.")
-            subject_slots = subject_slots[:total_slots]
+            logger.warning("⚠️ إجمالي الساعات (%s) يتجاوز المتاح (%s). سيتم استخدام %s حصة فقط.", total_hours, total_slots, total_slots)
             total_hours = total_slots
         
-        print(f"\n📊 Subject Distribution:")
-        print(f"  - Total slots required: {total_slots}")
-        print(f"  - Total hours to assign: {total_hours}")
-        print(f"  - Status: {'✅ Exact match' if total_hours == total_slots else '⚠️ Adjusted'}")
-        print(f"  - Class ID: {class_id}")
-        print(f"  - Section: {section if section else 'جميع الشعب'}")
+        # Expand subjects lazily and stop at total_slots, instead of building
+        # every hour up front and slicing off the excess afterwards
+        subject_slots = list(islice(
+            chain.from_iterable(
+                repeat(subject, max(1, subject_hours[subject.id]))
+                for subject in subjects
+            ),
+            total_slots
+        ))
+        
+        logger.debug("📊 Subject Distribution:")
+        logger.debug("  - Total slots required: %s", total_slots)
+        logger.debug("  - Total hours to assign: %s", total_hours)
+        logger.debug("  - Status: %s", '✅ Exact match' if total_hours == total_slots else '⚠️ Adjusted')
+        logger.debug("  - Class ID: %s", class_id)
+        logger.debug("  - Section: %s", section if section else 'جميع الشعب')
         
         # Get teacher-subject assignments for this specific class and section
         # This is CRITICAL to prevent period count mismatches across sections
@@ -536,22 +706,28 @@ class ScheduleGenerationService:
         for assignment in teacher_assignments:
             subject_teacher_map[assignment.subject_id] = assignment.teacher_id
         
-        print(f"  - Found {len(teacher_assignments)} teacher assignments for this class/section")
+        logger.debug("  - Found %s teacher assignments for this class/section", len(teacher_assignments))
         
         # Get all teachers with their availability
-        teachers = self.db.query(Teacher).filter(Teacher.is_active == True).all()
+        teachers = self.db.query(Teacher).options(load_only(*_TEACHER_SCHEDULING_COLUMNS)).filter(
+            Teacher.is_active == True
+        ).all()
         teacher_map = {t.id: t for t in teachers}
         
-        # Build teacher availability matrix: (teacher_id, day, period) -> is_free
+        # Build teacher availability: teacher_id -> {(day, period)} where the teacher is free
         # IMPORTANT: A teacher can only be available if the slot is FREE
         # If a slot is assigned (even to the same class), the teacher is NOT available
         # because they can't teach two sections at the same time
-        teacher_availability = {}
+        teacher_free_slots = defaultdict(set)
         for teacher in teachers:
-            if not teacher.free_time_slots:
+            busy_mask = busy_masks.get(teacher.id, 0) if busy_masks else 0
+            if teacher.id in self._availability_cache:
+                slots = self._availability_cache[teacher.id]
+            elif teacher.free_time_slots:
+                slots = _json_loads(teacher.free_time_slots)
+            else:
                 continue
             
-            slots = json.loads(teacher.free_time_slots)
             for slot in slots:
                 day = slot.get('day')  # 0-based
                 period = slot.get('period')  # 0-based
@@ -561,27 +737,37 @@ class ScheduleGenerationService:
                 # Teacher is available ONLY if status='free' AND is_free=True
                 # A teacher CANNOT teach two sections at the same time slot
                 if status == 'free' and is_free == True:
-                    teacher_availability[(teacher.id, day, period)] = True
+                    if busy_mask and busy_mask >> (day * periods_per_day + period) & 1:
+                        continue  # Taken by a section generated earlier in this run
+                    teacher_free_slots[teacher.id].add((day, period))
                 # NOTE: We do NOT include 'assigned' slots - a teacher in one section
                 # cannot simultaneously teach another section at the same time
         
-        print(f"\n📋 Teacher-aware placement:")
-        print(f"  - Loaded {len(teacher_map)} teachers")
-        print(f"  - Total teacher-slot availability: {len(teacher_availability)}")
-        
-        # Calculate scarcity matrix: how many teachers are free at each (day, period)
-        scarcity_matrix = {}
-        for day in range(num_days):
-            for period in range(periods_per_day):
-                count = sum(1 for (t_id, d, p) in teacher_availability if d == day and p == period)
-                scarcity_matrix[(day, period)] = count
-        
-        print(f"  - Scarcity matrix calculated (will prioritize scarce slots)")
+        logger.debug("📋 Teacher-aware placement:")
+        logger.debug("  - Loaded %s teachers", len(teacher_map))
+        logger.debug("  - Total teacher-slot availability: %s", sum(len(cells) for cells in teacher_free_slots.values()))
+        
+        # In one pass over each teacher's free slots, calculate:
+        # - the scarcity matrix: how many teachers are free at each (day, period)
+        # - each teacher's free-slot count (placement difficulty)
+        # - each teacher's free cells inside the grid, so placement only visits cells the teacher can take
+        scarcity_matrix = {(day, period): 0 for day in range(num_days) for period in range(periods_per_day)}
+        teacher_free_counts = {}
+        teacher_free_cells = defaultdict(set)  # teacher_id -> {(day, period)} within the grid
+        for t_id, cells in teacher_free_slots.items():
+            teacher_free_counts[t_id] = len(cells)
+            for cell in cells:
+                if cell in scarcity_matrix:
+                    scarcity_matrix[cell] += 1
+                    teacher_free_cells[t_id].add(cell)
+        
+        logger.debug("  - Scarcity matrix calculated (will prioritize scarce slots)")
         
         # Create a subject tracker for even distribution AND total placement
         subject_counts_per_day = {subject.id: [0] * num_days for subject in subjects}
+        subject_days_covered = {subject.id: 0 for subject in subjects}  # Days with at least one period
         subject_placed_total = {subject.id: 0 for subject in subjects}  # Track total placed per subject
-        subject_required = {subject.id: getattr(subject, 'weekly_hours', 1) or 1 for subject in subjects}
+        subject_required = subject_hours
         
         # DYNAMIC subject classification based on weekly_hours (not hardcoded names)
         # This works with ANY subject names in ANY language
@@ -590,18 +776,16 @@ class ScheduleGenerationService:
         # Medium subjects = 3 hours = flexible placement
         
         # Calculate thresholds dynamically based on actual subject hours
-        all_hours = [getattr(s, 'weekly_hours', 1) or 1 for s in subjects]
+        all_hours = [subject_hours[s.id] for s in subjects]
         avg_hours = sum(all_hours) / len(all_hours) if all_hours else 3
         
         def is_core_subject(subj):
             """Core = subjects with above-average weekly hours (important subjects)"""
-            hours = getattr(subj, 'weekly_hours', 1) or 1
-            return hours >= max(4, avg_hours)  # At least 4 hours or above average
+            return subject_hours[subj.id] >= max(4, avg_hours)  # At least 4 hours or above average
         
         def is_light_subject(subj):
             """Light = subjects with 1-2 weekly hours (electives, activities)"""
-            hours = getattr(subj, 'weekly_hours', 1) or 1
-            return hours <= 2
+            return subject_hours[subj.id] <= 2
         
         # Track which periods each subject has been placed at (for variety scoring)
         subject_period_usage = {subject.id: set() for subject in subjects}
@@ -612,12 +796,24 @@ class ScheduleGenerationService:
             teacher_id = subject_teacher_map.get(subj.id)
             if not teacher_id:
                 return 999  # No teacher = hardest
-            available_count = sum(1 for (t_id, d, p) in teacher_availability if t_id == teacher_id)
+            available_count = teacher_free_counts.get(teacher_id, 0)
             return -available_count  # Negative so fewer slots = higher priority
         
         # Sort subject_slots by placement difficulty (hardest first)
         subject_slots.sort(key=get_subject_placement_difficulty)
         
+        # Forward checking on teacher capacity: each teacher's demand (periods still to
+        # place) against supply (empty grid cells where they are free). A teacher with no
+        # slack needs every one of those cells, so other subjects should not take them
+        teacher_demand = Counter(
+            subject_teacher_map[subj.id] for subj in subject_slots if subject_teacher_map.get(subj.id)
+        )
+        teacher_supply = {t_id: len(teacher_free_cells[t_id]) for t_id in teacher_demand}
+        cell_teachers = defaultdict(list)  # (day, period) -> teachers with demand free there
+        for t_id in teacher_demand:
+            for cell in teacher_free_cells[t_id]:
+                cell_teachers[cell].append(t_id)
+        
         # Track failed placements for retry
         failed_placements = []
         
@@ -639,9 +835,9 @@ class ScheduleGenerationService:
                     )
                 ).all()
                 if active_constraints:
-                    print(f"  - Loaded {len(active_constraints)} user-defined constraints from database")
+                    logger.debug("  - Loaded %s user-defined constraints from database", len(active_constraints))
         except Exception as e:
-            print(f"  - Warning: Could not load constraints: {e}")
+            logger.warning("  - Warning: Could not load constraints: %s", e)
         
         # Build constraint lookup for quick access during scoring
         # no_consecutive_subjects: set of subject_ids that cannot have consecutive periods
@@ -683,11 +879,11 @@ class ScheduleGenerationService:
         }
         
         if no_consecutive_subjects:
-            print(f"  - عدم التتالي constraint active for {len(no_consecutive_subjects)} subjects")
+            logger.debug("  - عدم التتالي constraint active for %s subjects", len(no_consecutive_subjects))
         if forbidden_slots:
-            print(f"  - Forbidden slots: {len(forbidden_slots)}")
+            logger.debug("  - Forbidden slots: %s", len(forbidden_slots))
         if subject_every_day:
-            print(f"  - مادة كل يوم constraint active for {len(subject_every_day)} subjects")
+            logger.debug("  - مادة كل يوم constraint active for %s subjects", len(subject_every_day))
         
         # Place subjects using TEACHER-AWARE algorithm
         for subject in subject_slots:
@@ -696,194 +892,201 @@ class ScheduleGenerationService:
             # Find the teacher assigned to this subject
             teacher_id = subject_teacher_map.get(subject_id)
             if not teacher_id:
-                print(f"⚠️  No teacher assigned to subject {subject.subject_name}")
+                logger.warning("⚠️  No teacher assigned to subject %s", subject.subject_name)
                 continue
             
+            # Per-subject terms that don't depend on the candidate cell, computed once
+            # per placement instead of once per (day, period)
+            subject_is_core = is_core_subject(subject)
+            subject_is_light = is_light_subject(subject)
+            subject_day_counts = subject_counts_per_day[subject_id]
+            days_with_subject = subject_days_covered[subject_id]
+            if subject_is_light:
+                # Count light subjects on each day
+                light_per_day = [
+                    sum(1 for slot in schedule_grid[d] if slot and is_light_subject(slot[0]))
+                    for d in range(num_days)
+                ]
+                min_light = min(light_per_day)
+            
             # Find all valid slots where:
             # 1. Grid slot is empty
             # 2. Teacher is actually free
             valid_slots = []
-            for day in range(num_days):
-                for period in range(periods_per_day):
-                    # Check if grid slot is empty
-                    if schedule_grid[day][period] is not None:
-                        continue
-                    
-                    # Check if teacher is free at this day/period
-                    if (teacher_id, day, period) not in teacher_availability:
-                        continue
-                    
-                    # ========== APPLY USER-DEFINED CONSTRAINTS (HARD) ==========
-                    # These are constraints the user added through the frontend UI
-                    
-                    # Check FORBIDDEN constraint - completely skip this slot
-                    if (subject_id, day, period) in forbidden_slots:
-                        constraint_stats['forbidden_blocked'] += 1
-                        continue  # User said this subject cannot be here
-                    
-                    # Check NO_CONSECUTIVE constraint - skip if would create consecutive
-                    # عدم التتالي = subject cannot have 2 periods next to each other
-                    if subject_id in no_consecutive_subjects:
-                        prev_slot = schedule_grid[day][period-1] if period > 0 else None
-                        next_slot = schedule_grid[day][period+1] if period < periods_per_day - 1 else None
-                        prev_subj_id = prev_slot[0].id if prev_slot else None
-                        next_subj_id = next_slot[0].id if next_slot else None
-                        
-                        if prev_subj_id == subject_id or next_subj_id == subject_id:
-                            constraint_stats['no_consecutive_blocked'] += 1
-                            continue  # User said no consecutive for this subject
-                    
-                    # Calculate preference score (LOWER = BETTER):
-                    score = 0
-                    
-                    # Check REQUIRED constraint - give bonus for required slots
-                    if (subject_id, day, period) in required_slots:
-                        score -= 100  # Strong bonus - user wants this subject here
-                    
-                    # 1. Scarcity bonus: Prefer slots where fewer teachers are available
-                    scarcity_count = scarcity_matrix.get((day, period), 1)
-                    score += scarcity_count * 5
-                    
-                    # 2. Even distribution across week: SOFT penalty for >2 periods per day
-                    # This is a soft constraint - degrades gracefully if teacher only available on few days
-                    day_count = subject_counts_per_day[subject_id][day]
-                    if day_count == 0:
-                        score += 0  # Best - first period on this day
-                    elif day_count == 1:
-                        score += 10  # OK - second period on this day
-                    elif day_count == 2:
-                        score += 30  # Less ideal - third period (but allowed if needed)
+            # Only the cells where the teacher is free, in (day, period) order
+            for day, period in sorted(teacher_free_cells[teacher_id]):
+                # Check if grid slot is empty
+                if schedule_grid[day][period] is not None:
+                    continue
+                
+                # Subjects in the neighbouring periods of this day
+                day_subject_ids = subject_id_grid[day]
+                prev_subject_id = day_subject_ids[period-1] if period > 0 else None
+                next_subject_id = day_subject_ids[period+1] if period < periods_per_day - 1 else None
+                
+                # ========== APPLY USER-DEFINED CONSTRAINTS (HARD) ==========
+                # These are constraints the user added through the frontend UI
+                
+                # Check FORBIDDEN constraint - completely skip this slot
+                if (subject_id, day, period) in forbidden_slots:
+                    constraint_stats['forbidden_blocked'] += 1
+                    continue  # User said this subject cannot be here
+                
+                # Check NO_CONSECUTIVE constraint - skip if would create consecutive
+                # عدم التتالي = subject cannot have 2 periods next to each other
+                if subject_id in no_consecutive_subjects:
+                    if prev_subject_id == subject_id or next_subject_id == subject_id:
+                        constraint_stats['no_consecutive_blocked'] += 1
+                        continue  # User said no consecutive for this subject
+                
+                # Calculate preference score (LOWER = BETTER):
+                score = 0
+                
+                # Check REQUIRED constraint - give bonus for required slots
+                if (subject_id, day, period) in required_slots:
+                    score -= 100  # Strong bonus - user wants this subject here
+                
+                # 1. Scarcity bonus: Prefer slots where fewer teachers are available
+                scarcity_count = scarcity_matrix.get((day, period), 1)
+                score += scarcity_count * 5
+                
+                # 2. Even distribution across week: SOFT penalty for >2 periods per day
+                # This is a soft constraint - degrades gracefully if teacher only available on few days
+                day_count = subject_day_counts[day]
+                if day_count == 0:
+                    score += 0  # Best - first period on this day
+                elif day_count == 1:
+                    score += 10  # OK - second period on this day
+                elif day_count == 2:
+                    score += 30  # Less ideal - third period (but allowed if needed)
+                else:
+                    score += 50 + (day_count * 10)  # 4+ periods: increasing penalty
+                
+                # 3. Period timing preference based on subject type
+                # Core subjects prefer early periods (1-4), light subjects prefer late (5-6)
+                if subject_is_core:
+                    # Core subjects: prefer periods 0-3 (1-4 in display)
+                    if period <= 3:
+                        score -= 15  # Bonus for early placement
                     else:
-                        score += 50 + (day_count * 10)  # 4+ periods: increasing penalty
-                    
-                    # 3. Period timing preference based on subject type
-                    # Core subjects prefer early periods (1-4), light subjects prefer late (5-6)
-                    if is_core_subject(subject):
-                        # Core subjects: prefer periods 0-3 (1-4 in display)
-                        if period <= 3:
-                            score -= 15  # Bonus for early placement
-                        else:
-                            score += 20  # Penalty for late placement
-                    elif is_light_subject(subject):
-                        # Light subjects: prefer periods 4-5 (5-6 in display)
-                        if period >= 4:
-                            score -= 15  # Bonus for late placement
-                        else:
-                            score += 5  # Small penalty for early placement
-                    
-                    # 4. Consecutive period penalty (soft constraint)
-                    # Prefer variety - penalize same subject in adjacent periods
-                    prev_slot = schedule_grid[day][period-1] if period > 0 else None
-                    next_slot = schedule_grid[day][period+1] if period < periods_per_day - 1 else None
-                    prev_subject_id = prev_slot[0].id if prev_slot else None
-                    next_subject_id = next_slot[0].id if next_slot else None
-                    
-                    if prev_subject_id == subject_id:
-                        score += 25  # Penalty for 2 consecutive
-                        # Check for 3 consecutive (even higher penalty)
-                        if period > 1:
-                            prev2 = schedule_grid[day][period-2]
-                            if prev2 and prev2[0].id == subject_id:
-                                score += 75  # Total 100 penalty for 3 consecutive
-                    
-                    if next_subject_id == subject_id:
-                        score += 25  # Penalty for placing before existing same subject
-                    
-                    # 5. Weekly spread bonus: reward spreading across more days
-                    # Calculate how many days already have this subject
-                    days_with_subject = sum(1 for d in range(num_days) if subject_counts_per_day[subject_id][d] > 0)
-                    if day_count == 0 and days_with_subject < subject_required[subject_id]:
-                        score -= 15  # Bonus for using a new day (increased)
-                    
-                    # 5b. SUBJECT_EVERY_DAY constraint (مادة كل يوم)
-                    # If user said this subject must appear every day, strongly prefer empty days
-                    if subject_id in subject_every_day:
+                        score += 20  # Penalty for late placement
+                elif subject_is_light:
+                    # Light subjects: prefer periods 4-5 (5-6 in display)
+                    if period >= 4:
+                        score -= 15  # Bonus for late placement
+                    else:
+                        score += 5  # Small penalty for early placement
+                
+                # 4. Consecutive period penalty (soft constraint)
+                # Prefer variety - penalize same subject in adjacent periods
+                if prev_subject_id == subject_id:
+                    score += 25  # Penalty for 2 consecutive
+                    # Check for 3 consecutive (even higher penalty)
+                    if period > 1 and day_subject_ids[period-2] == subject_id:
+                        score += 75  # Total 100 penalty for 3 consecutive
+                
+                if next_subject_id == subject_id:
+                    score += 25  # Penalty for placing before existing same subject
+                
+                # 5. Weekly spread bonus: reward spreading across more days
+                if day_count == 0 and days_with_subject < subject_required[subject_id]:
+                    score -= 15  # Bonus for using a new day (increased)
+                
+                # 5b. SUBJECT_EVERY_DAY constraint (مادة كل يوم)
+                # If user said this subject must appear every day, strongly prefer empty days
+                if subject_id in subject_every_day:
+                    if day_count == 0:
+                        score -= 50  # Strong bonus for placing on a day that doesn't have this subject
+                    # Count how many days still need this subject
+                    days_still_needed = num_days - days_with_subject
+                    periods_remaining = subject_required[subject_id] - subject_placed_total.get(subject_id, 0)
+                    # If running low on periods, prioritize empty days even more
+                    if days_still_needed > 0 and periods_remaining <= days_still_needed:
                         if day_count == 0:
-                            score -= 50  # Strong bonus for placing on a day that doesn't have this subject
-                        # Count how many days still need this subject
-                        days_still_needed = num_days - days_with_subject
-                        periods_remaining = subject_required[subject_id] - subject_placed_total.get(subject_id, 0)
-                        # If running low on periods, prioritize empty days even more
-                        if days_still_needed > 0 and periods_remaining <= days_still_needed:
-                            if day_count == 0:
-                                score -= 100  # Critical: must place on empty day
-                    
-                    # 6. Period variety across days: avoid same subject at same period on different days
-                    # Use the period usage tracker for efficiency
-                    if period in subject_period_usage[subject_id]:
-                        score += 25  # Penalty for reusing same period
-                        # Extra penalty if used more than once
-                        same_period_count = sum(1 for d in range(num_days) 
-                                               if schedule_grid[d][period] and schedule_grid[d][period][0].id == subject_id)
-                        score += same_period_count * 15  # Additional penalty per occurrence
-                    
-                    # 7. Adjacent day variety: avoid same pattern on consecutive days
-                    # Check if previous day has same subject at similar positions
-                    if day > 0:
-                        prev_day_slots = schedule_grid[day - 1]
-                        # Check if subject appears at same or adjacent period on previous day
-                        for offset in [-1, 0, 1]:
-                            check_period = period + offset
-                            if 0 <= check_period < periods_per_day:
-                                prev_slot = prev_day_slots[check_period]
-                                if prev_slot and prev_slot[0].id == subject_id:
-                                    score += 10  # Penalty for similar pattern to previous day
-                    
-                    # 8. Spread light subjects across ALL days (not clustered on specific days)
-                    if is_light_subject(subject):
-                        # Count light subjects on each day
-                        light_per_day = [0] * num_days
-                        for d in range(num_days):
-                            for p in range(periods_per_day):
-                                slot = schedule_grid[d][p]
-                                if slot and is_light_subject(slot[0]):
-                                    light_per_day[d] += 1
-                        
-                        # Penalty for placing on day that already has 2+ light subjects
-                        if light_per_day[day] >= 2:
-                            score += 25  # Strong penalty for clustering
-                        elif light_per_day[day] >= 1:
-                            score += 10  # Mild penalty
-                        
-                        # Bonus for spreading to days with fewer light subjects
-                        min_light = min(light_per_day)
-                        if light_per_day[day] == min_light:
-                            score -= 10  # Bonus for evening out distribution
+                            score -= 100  # Critical: must place on empty day
+                
+                # 6. Period variety across days: avoid same subject at same period on different days
+                # Use the period usage tracker for efficiency
+                if period in subject_period_usage[subject_id]:
+                    score += 25  # Penalty for reusing same period
+                    # Extra penalty if used more than once
+                    same_period_count = sum(1 for d in range(num_days) if subject_id_grid[d][period] == subject_id)
+                    score += same_period_count * 15  # Additional penalty per occurrence
+                
+                # 7. Adjacent day variety: avoid same pattern on consecutive days
+                # Check if previous day has same subject at similar positions
+                if day > 0:
+                    prev_day_subject_ids = subject_id_grid[day - 1]
+                    # Check if subject appears at same or adjacent period on previous day
+                    for offset in [-1, 0, 1]:
+                        check_period = period + offset
+                        if 0 <= check_period < periods_per_day:
+                            if prev_day_subject_ids[check_period] == subject_id:
+                                score += 10  # Penalty for similar pattern to previous day
+                
+                # 8. Spread light subjects across ALL days (not clustered on specific days)
+                if subject_is_light:
+                    # Penalty for placing on day that already has 2+ light subjects
+                    if light_per_day[day] >= 2:
+                        score += 25  # Strong penalty for clustering
+                    elif light_per_day[day] >= 1:
+                        score += 10  # Mild penalty
                     
-                    valid_slots.append((day, period, score))
+                    # Bonus for spreading to days with fewer light subjects
+                    if light_per_day[day] == min_light:
+                        score -= 10  # Bonus for evening out distribution
+                
+                valid_slots.append((day, period, score))
+            
+            # Prune cells another teacher cannot spare, unless that leaves nothing
+            safe_slots = [
+                slot for slot in valid_slots
+                if not any(
+                    t_id != teacher_id and teacher_supply[t_id] <= teacher_demand[t_id]
+                    for t_id in cell_teachers[(slot[0], slot[1])]
+                )
+            ]
+            if safe_slots:
+                valid_slots = safe_slots
             
-            # Sort by score (lowest = best) and place in best valid slot
+            # Place in the best valid slot (lowest score; ties keep the earliest cell)
             if valid_slots:
-                valid_slots.sort(key=lambda x: x[2])
-                best_day, best_period, _ = valid_slots[0]
+                best_day, best_period, _ = min(valid_slots, key=lambda x: x[2])
                 
                 # Store (subject, teacher_id) tuple to preserve the teacher assignment
                 schedule_grid[best_day][best_period] = (subject, teacher_id)
-                subject_counts_per_day[subject_id][best_day] += 1
+                subject_id_grid[best_day][best_period] = subject_id
+                if subject_day_counts[best_day] == 0:
+                    subject_days_covered[subject_id] += 1
+                subject_day_counts[best_day] += 1
                 subject_placed_total[subject_id] = subject_placed_total.get(subject_id, 0) + 1  # Track total placed
                 subject_period_usage[subject_id].add(best_period)  # Track which periods this subject uses
                 
                 # CRITICAL FIX: Remove teacher from availability at this slot
                 # This prevents the same teacher from being assigned twice at the same time
-                if (teacher_id, best_day, best_period) in teacher_availability:
-                    del teacher_availability[(teacher_id, best_day, best_period)]
+                teacher_free_cells[teacher_id].discard((best_day, best_period))
                 
                 # Update scarcity matrix: one teacher is now occupied at this slot
                 if (best_day, best_period) in scarcity_matrix:
                     scarcity_matrix[(best_day, best_period)] -= 1
+                
+                # The cell is no longer supply for anyone free there
+                teacher_demand[teacher_id] -= 1
+                for t_id in cell_teachers[(best_day, best_period)]:
+                    teacher_supply[t_id] -= 1
             else:
                 # Track failed placement for retry
                 failed_placements.append(subject)
-                print(f"⚠️  Could not find valid slot for {subject.subject_name} (teacher {teacher_map[teacher_id].full_name if teacher_id in teacher_map else 'unknown'})")
+                logger.warning("⚠️  Could not find valid slot for %s (teacher %s)", subject.subject_name, teacher_map[teacher_id].full_name if teacher_id in teacher_map else 'unknown')
         
         # CRITICAL: Verify all subjects got their required periods
-        print(f"\n📊 Subject Placement Summary:")
+        logger.debug("📊 Subject Placement Summary:")
         placement_errors = []
         for subject in subjects:
             required = subject_required[subject.id]
             placed = subject_placed_total.get(subject.id, 0)
             status = "✅" if placed == required else ("⚠️ OVER" if placed > required else "❌ UNDER")
-            print(f"  - {subject.subject_name}: {placed}/{required} periods {status}")
+            logger.debug("  - %s: %s/%s periods %s", subject.subject_name, placed, required, status)
             if placed != required:
                 placement_errors.append({
                     'subject': subject.subject_name,
@@ -895,7 +1098,7 @@ class ScheduleGenerationService:
         # If there are failed placements, try to place them in ANY remaining empty slot
         # (relaxing teacher availability as a last resort)
         if failed_placements:
-            print(f"\n🔄 Attempting to place {len(failed_placements)} failed subjects in remaining slots...")
+            logger.debug("🔄 Attempting to place %s failed subjects in remaining slots...", len(failed_placements))
             for subject in failed_placements:
                 # Find any empty slot
                 placed = False
@@ -907,28 +1110,49 @@ class ScheduleGenerationService:
                             # Force-place with first available teacher for this subject
                             fallback_teacher_id = subject_teacher_map.get(subject.id)
                             schedule_grid[day][period] = (subject, fallback_teacher_id)
+                            subject_id_grid[day][period] = subject.id
                             subject_placed_total[subject.id] = subject_placed_total.get(subject.id, 0) + 1
-                            print(f"  ⚠️ Force-placed {subject.subject_name} at day {day+1} period {period+1}")
+                            logger.warning("  ⚠️ Force-placed %s at day %s period %s", subject.subject_name, day+1, period+1)
                             placed = True
                             break
         
         # ========== PRINT CONSTRAINT STATISTICS ==========
         # This proves that constraints were actually applied, not just luck
         if any(v > 0 for v in constraint_stats.values()):
-            print(f"\n🔒 Constraint Enforcement Report:")
+            logger.debug("🔒 Constraint Enforcement Report:")
             if constraint_stats['no_consecutive_blocked'] > 0:
-                print(f"  - عدم التتالي: blocked {constraint_stats['no_consecutive_blocked']} consecutive placements")
+                logger.debug("  - عدم التتالي: blocked %s consecutive placements", constraint_stats['no_consecutive_blocked'])
             if constraint_stats['forbidden_blocked'] > 0:
-                print(f"  - Forbidden slots: blocked {constraint_stats['forbidden_blocked']} placements")
+                logger.debug("  - Forbidden slots: blocked %s placements", constraint_stats['forbidden_blocked'])
             if constraint_stats['required_preferred'] > 0:
-                print(f"  - Required slots: preferred {constraint_stats['required_preferred']} placements")
-            print(f"  ✅ Constraints were ACTIVELY enforced - not luck!")
+                logger.debug("  - Required slots: preferred %s placements", constraint_stats['required_preferred'])
+            logger.debug("  ✅ Constraints were ACTIVELY enforced - not luck!")
         else:
             if no_consecutive_subjects or forbidden_slots or subject_every_day:
-                print(f"\n🔒 Constraints active but no blocking needed (schedule naturally avoided violations)")
+                logger.debug("🔒 Constraints active but no blocking needed (schedule naturally avoided violations)")
         
         return schedule_grid, teacher_map
     
+    def _load_availability_cache(self, teacher_ids: Optional[Set[int]] = None):
+        """
+        Parse teachers' free_time_slots JSON once into self._availability_cache
+        
+        Args:
+            teacher_ids: Teachers to (re)load; None reloads all active teachers
+        """
+        query = self.db.query(Teacher.id, Teacher.free_time_slots)
+        if teacher_ids is None:
+            self._availability_cache = {}
+            query = query.filter(Teacher.is_active == True)
+        else:
+            query = query.filter(Teacher.id.in_(teacher_ids))
+        
+        for teacher_id, free_time_slots in query.all():
+            try:
+                self._availability_cache[teacher_id] = _json_loads(free_time_slots) if free_time_slots else []
+            except (json.JSONDecodeError, TypeError):
+                self._availability_cache[teacher_id] = []
+    
     def _save_teacher_states(self, teacher_ids: List[int]) -> Dict[int, str]:
         """
         Save current free_time_slots for teachers before generation
@@ -940,11 +1164,12 @@ class ScheduleGenerationService:
             Dictionary mapping teacher_id to free_time_slots JSON string
         """
         teacher_states = {}
-        for teacher_id in teacher_ids:
-            teacher = self.db.query(Teacher).filter(Teacher.id == teacher_id).first()
-            if teacher:
-                teacher_states[teacher_id] = teacher.free_time_slots
-                print(f"Saved state for teacher {teacher.full_name} (ID: {teacher_id})")
+        rows = self.db.query(Teacher.id, Teacher.full_name, Teacher.free_time_slots).filter(
+            Teacher.id.in_(teacher_ids)
+        ).all()
+        for teacher_id, full_name, free_time_slots in rows:
+            teacher_states[teacher_id] = free_time_slots
+            logger.debug("Saved state for teacher %s (ID: %s)", full_name, teacher_id)
         return teacher_states
     
     def _restore_teacher_states(self, teacher_states: Dict[int, str]):
@@ -954,16 +1179,22 @@ class ScheduleGenerationService:
         Args:
             teacher_states: Dictionary mapping teacher_id to free_time_slots JSON string
         """
-        for teacher_id, slots_json in teacher_states.items():
-            teacher = self.db.query(Teacher).filter(Teacher.id == teacher_id).first()
-            if teacher:
-                teacher.free_time_slots = slots_json
-                print(f"Restored state for teacher {teacher.full_name} (ID: {teacher_id})")
         try:
+            # Skip teachers deleted since their state was saved, then restore the rest in one bulk UPDATE
+            existing_ids = {
+                teacher_id for (teacher_id,) in self.db.query(Teacher.id).filter(
+                    Teacher.id.in_(list(teacher_states))
+                ).all()
+            }
+            self.db.bulk_update_mappings(Teacher, [
+                {'id': teacher_id, 'free_time_slots': slots_json}
+                for teacher_id, slots_json in teacher_states.items()
+                if teacher_id in existing_ids
+            ])
             self.db.commit()
-            print("Successfully restored all teacher states")
+            logger.debug("Successfully restored states for %s teachers", len(existing_ids))
         except Exception as e:
-            print(f"Error restoring teacher states: {e}")
+            logger.error("Error restoring teacher states: %s", e)
             self.db.rollback()
     
     def _retry_with_exponential_backoff(
@@ -975,7 +1206,10 @@ class ScheduleGenerationService:
         **kwargs
     ):
         """
-        Retry a function with exponential backoff
+        Retry a function with exponential backoff and full jitter
+        
+        Each wait is drawn uniformly from [0, initial_delay * 2**attempt] so
+        concurrent callers failing together don't retry in lockstep.
         
         Args:
             func: Function to retry
@@ -989,8 +1223,6 @@ class ScheduleGenerationService:
         Raises:
             Last exception if all retries fail
         """
-        import time
-        
         last_exception = None
         for attempt in range(max_retries + 1):
             try:
@@ -998,12 +1230,11 @@ class ScheduleGenerationService:
             except Exception as e:
                 last_exception = e
                 if attempt < max_retries:
-                    delay = initial_delay * (2 ** attempt)  # Exponential backoff
-                    print(f"⚠️ Attempt {attempt + 1} failed: {str(e)[:100]}")
-                    print(f"   Retrying in {delay:.2f} seconds...")
+                    delay = random.uniform(0, initial_delay * (2 ** attempt))  # Exponential backoff, full jitter
+                    logger.warning("Attempt %d failed: %s; retrying in %.2f seconds", attempt + 1, str(e)[:100], delay)
                     time.sleep(delay)
                 else:
-                    print(f"❌ All {max_retries + 1} attempts failed")
+                    logger.error("All %d attempts failed", max_retries + 1)
         
         raise last_exception
     
@@ -1024,22 +1255,23 @@ class ScheduleGenerationService:
         """
         start_time = time.time()
         teacher_states = {}  # Store teacher states for rollback
+        session_type_value = request.session_type.value if hasattr(request.session_type, 'value') else str(request.session_type)
         
         try:
             # Step 1: Validate prerequisites if not provided
             if validation_results is None:
-                print("\n=== Running Validation Check ===")
+                logger.info("=== Running Validation Check ===")
                 validation_results = self.validation_service.validate_schedule_prerequisites(
                     academic_year_id=request.academic_year_id,
                     class_id=request.class_id,
                     section=request.section,
-                    session_type=request.session_type.value if hasattr(request.session_type, 'value') else str(request.session_type)
+                    session_type=session_type_value
                 )
-                print(f"Validation result: can_proceed={validation_results.get('can_proceed')}, is_valid={validation_results.get('is_valid')}")
+                logger.debug("Validation result: can_proceed=%s, is_valid=%s", validation_results.get('can_proceed'), validation_results.get('is_valid'))
             
             # Step 2: Check if we can proceed based on validation
             if not validation_results.get('can_proceed', False):
-                print("Cannot proceed with generation - validation failed")
+                logger.warning("Cannot proceed with generation - validation failed")
                 errors = validation_results.get('errors', [])
                 error_message = " | ".join(errors) if errors else "فشل التحقق من متطلبات إنشاء الجدول"
                 raise ScheduleValidationError(
@@ -1055,24 +1287,19 @@ class ScheduleGenerationService:
             # Step 4: Filter teachers based on validation results
             # Only use teachers with sufficient availability
             subject_details = validation_results.get('subject_details', [])
-            valid_teacher_ids = set()
-            subject_teacher_map = {}  # Map subject_id to teacher_id for validated assignments
-            
-            for detail in subject_details:
-                if detail.get('has_teacher') and detail.get('is_sufficient'):
-                    teacher_id = detail.get('teacher_id')
-                    subject_id = detail.get('subject_id')
-                    if teacher_id and subject_id:
-                        valid_teacher_ids.add(teacher_id)
-                        subject_teacher_map[subject_id] = teacher_id
-                        # Skip printing Arabic names to avoid Windows console encoding errors
+            valid_teacher_ids = {
+                detail['teacher_id']
+                for detail in subject_details
+                if detail.get('has_teacher') and detail.get('is_sufficient')
+                and detail.get('teacher_id') and detail.get('subject_id')
+            }
             
             # Filter the teachers list to only include validated teachers
             if valid_teacher_ids:
                 teachers = [t for t in teachers if t.id in valid_teacher_ids]
-                print(f"Filtered to {len(teachers)} validated teachers with sufficient availability")
+                logger.debug("Filtered to %s validated teachers with sufficient availability", len(teachers))
             else:
-                print("Warning: No teachers with sufficient availability found, using all available teachers")
+                logger.warning("Warning: No teachers with sufficient availability found, using all available teachers")
                 # Add validation warnings
                 for detail in subject_details:
                     if detail.get('has_teacher') and not detail.get('is_sufficient'):
@@ -1083,7 +1310,7 @@ class ScheduleGenerationService:
             # Step 5: Print database data for debugging
             self._print_database_data(
                 academic_year_id=request.academic_year_id,
-                session_type=request.session_type.value if hasattr(request.session_type, 'value') else str(request.session_type),
+                session_type=session_type_value,
                 class_id=request.class_id,
                 section=request.section,
                 classes=classes,
@@ -1095,7 +1322,7 @@ class ScheduleGenerationService:
             # Step 6: Save teacher states before generation (for rollback)
             teacher_ids = [t.id for t in teachers]
             teacher_states = self._save_teacher_states(teacher_ids)
-            print(f"Saved states for {len(teacher_states)} teachers")
+            logger.debug("Saved states for %s teachers", len(teacher_states))
             
             # Step 6b: Clear OLD teacher slots for this class/section before regenerating
             # This ensures no stale data from previous schedules remains
@@ -1106,18 +1333,21 @@ class ScheduleGenerationService:
                     section=section
                 )
                 if cleared > 0:
-                    print(f"Cleared {cleared} old teacher slot assignments for class {request.class_id}")
+                    logger.debug("Cleared %s old teacher slot assignments for class %s", cleared, request.class_id)
+            
+            # Parse every teacher's free_time_slots once for all classes and sections below
+            self._load_availability_cache()
             
             # Debug logging
-            print(f"\n=== Schedule Generation Started ===")
-            print(f"Academic Year ID: {request.academic_year_id}")
-            print(f"Session Type: {request.session_type}")
-            print(f"Target Class ID: {request.class_id}")
-            print(f"Target Section: {request.section}")
-            print(f"Found {len(classes)} classes")
-            print(f"Found {len(subjects)} total subjects")
-            print(f"Found {len(teachers)} teachers")
-            print(f"Teachers: {[t.full_name for t in teachers]}")
+            logger.info("=== Schedule Generation Started ===")
+            logger.debug("Academic Year ID: %s", request.academic_year_id)
+            logger.debug("Session Type: %s", request.session_type)
+            logger.debug("Target Class ID: %s", request.class_id)
+            logger.debug("Target Section: %s", request.section)
+            logger.debug("Found %s classes", len(classes))
+            logger.debug("Found %s total subjects", len(subjects))
+            logger.debug("Found %s teachers", len(teachers))
+            logger.debug("Teachers: %s", [t.full_name for t in teachers])
             
             if not classes:
                 raise InsufficientDataError(
@@ -1127,17 +1357,43 @@ class ScheduleGenerationService:
             # Step 2: Generate schedules for each class
             total_created = 0
             all_schedules = []
+            # Distinct teachers/subjects placed, for the response summary
+            teacher_ids_seen = set()
+            subject_ids_seen = set()
+            # Resolve working day names to day numbers once for every class and section
+            day_numbers = [
+                _DAY_MAPPING.get(day_name.lower() if isinstance(day_name, str) else day_name.value, 1)
+                for day_name in request.working_days
+            ]
+            # Conflict detection across sections: one bitmask per teacher of the
+            # (day, period) cells already placed in this run, bit day * periods_per_day + period
+            teacher_busy: Dict[int, int] = defaultdict(int)
+            # Columns that are the same for every generated row
+            shared_columns = {
+                'academic_year_id': request.academic_year_id,
+                'session_type': session_type_value,
+                'name': request.name,
+                'start_date': request.start_date,
+                'end_date': request.end_date,
+                'is_active': True,
+                'status': "published",
+            }
+            
+            # Group subjects by class once instead of rescanning all subjects per class
+            subjects_by_class = defaultdict(list)
+            for subject in subjects:
+                subjects_by_class[subject.class_id].append(subject)
             
             for cls in classes:
                 # Get subjects for this class
-                class_subjects = [s for s in subjects if s.class_id == cls.id]
+                class_subjects = subjects_by_class.get(cls.id, [])
                 
-                print(f"\nProcessing class {cls.grade_level}-{cls.grade_number} (ID: {cls.id})")
-                print(f"Found {len(class_subjects)} subjects for this class")
+                logger.debug("Processing class %s-%s (ID: %s)", cls.grade_level, cls.grade_number, cls.id)
+                logger.debug("Found %s subjects for this class", len(class_subjects))
                 
                 if not class_subjects:
                     warning = f"No subjects found for class {cls.grade_level}-{cls.grade_number}"
-                    print(f"WARNING: {warning}")
+                    logger.warning("WARNING: %s", warning)
                     self.warnings.append(warning)
                     continue
                 
@@ -1151,12 +1407,6 @@ class ScheduleGenerationService:
                     sections_to_generate = list(range(1, section_count + 1))
                 
                 for section_num in sections_to_generate:
-                    # Create schedule entries for each day and period
-                    day_mapping = {
-                        'sunday': 1, 'monday': 2, 'tuesday': 3, 
-                        'wednesday': 4, 'thursday': 5, 'friday': 6, 'saturday': 7
-                    }
-                    
                     # Use even distribution algorithm to avoid clustering
                     # CRITICAL: Pass class_id and section to ensure proper teacher assignment filtering
                     # Returns (schedule_grid, teacher_map) where grid contains (subject, teacher_id) tuples
@@ -1165,16 +1415,20 @@ class ScheduleGenerationService:
                         num_days=len(request.working_days),
                         periods_per_day=request.periods_per_day,
                         class_id=cls.id,
-                        section=str(section_num)
+                        section=str(section_num),
+                        busy_masks=teacher_busy
                     )
+                    for day_idx, row in enumerate(schedule_grid):
+                        for period_idx, cell in enumerate(row):
+                            if cell and cell[1]:
+                                teacher_busy[cell[1]] |= 1 << (day_idx * request.periods_per_day + period_idx)
                     
                     # CRITICAL VALIDATION: Ensure NO empty slots in the grid
                     empty_slots = []
-                    day_names_ar = ["الأحد", "الاثنين", "الثلاثاء", "الأربعاء", "الخميس"]
                     for day_idx_check in range(len(schedule_grid)):
                         for period_idx_check in range(len(schedule_grid[day_idx_check])):
                             if schedule_grid[day_idx_check][period_idx_check] is None:
-                                day_name_ar = day_names_ar[day_idx_check] if day_idx_check < len(day_names_ar) else f"يوم {day_idx_check+1}"
+                                day_name_ar = _DAY_NAMES[day_idx_check] if day_idx_check < len(_DAY_NAMES) else f"يوم {day_idx_check+1}"
                                 empty_slots.append(f"{day_name_ar} - الحصة {period_idx_check + 1}")
                     
                     if empty_slots:
@@ -1191,10 +1445,8 @@ class ScheduleGenerationService:
                             ]
                         )
                     
-                    day_idx = 0
-                    for day_name in request.working_days:
-                        day_num = day_mapping.get(day_name.lower() if isinstance(day_name, str) else day_name.value, 1)
-                        
+                    # Create schedule entries for each day and period
+                    for day_idx, day_num in enumerate(day_numbers):
                         for period in range(1, request.periods_per_day + 1):
                             # Get the (subject, teacher_id) tuple from the schedule grid
                             grid_entry = schedule_grid[day_idx][period - 1]  # period is 1-based, array is 0-based
@@ -1202,7 +1454,7 @@ class ScheduleGenerationService:
                             # This should never happen after our validation, but check anyway
                             if not grid_entry:
                                 raise ScheduleValidationError(
-                                    detail=f"خطأ داخلي: فترة فارغة غير متوقعة في {day_names_ar[day_idx]} الحصة {period}",
+                                    detail=f"خطأ داخلي: فترة فارغة غير متوقعة في {_DAY_NAMES[day_idx]} الحصة {period}",
                                     errors=["هذا خطأ في النظام. يرجى الاتصال بالدعم الفني."]
                                 )
                             
@@ -1216,9 +1468,9 @@ class ScheduleGenerationService:
                                 # CRITICAL ERROR - Cannot proceed without a teacher
                                 error_msg = (
                                     f"⚠️ خطأ حرج: لا يوجد معلم متاح للمادة '{subject.subject_name}' "
-                                    f"في {day_names_ar[day_idx]} الحصة {period}."
+                                    f"في {_DAY_NAMES[day_idx]} الحصة {period}."
                                 )
-                                print(f"CRITICAL ERROR: {error_msg}")
+                                logger.error("CRITICAL ERROR: %s", error_msg)
                                 
                                 # Rollback any changes made so far
                                 self.db.rollback()
@@ -1230,73 +1482,58 @@ class ScheduleGenerationService:
                                 raise ScheduleValidationError(
                                     detail=error_msg,
                                     errors=[
-                                        f"الفترة المتأثرة: {day_names_ar[day_idx]} - الحصة {period}",
+                                        f"الفترة المتأثرة: {_DAY_NAMES[day_idx]} - الحصة {period}",
                                         f"المادة: {subject.subject_name}",
                                         "السبب المحتمل: جميع المعلمين المكلفين بهذه المادة غير متاحين في هذا الوقت أو مشغولين في صف آخر",
                                         "الحل: تحديث أوقات فراغ المعلمين أو إعادة توزيع المواد"
                                     ]
                                 )
                             
-                            # Create schedule entry for ALL periods (including breaks)
-                            schedule_entry = Schedule()
-                            schedule_entry.academic_year_id = request.academic_year_id
-                            schedule_entry.session_type = request.session_type.value if hasattr(request.session_type, 'value') else str(request.session_type)
-                            schedule_entry.class_id = cls.id
-                            schedule_entry.section = str(section_num)
-                            schedule_entry.day_of_week = day_num
-                            schedule_entry.period_number = period
-                            schedule_entry.subject_id = subject.id
-                            schedule_entry.teacher_id = teacher.id
-                            schedule_entry.name = request.name
-                            schedule_entry.start_date = request.start_date
-                            schedule_entry.end_date = request.end_date
-                            schedule_entry.is_active = True
-                            schedule_entry.status = "published"
-                            
-                            self.db.add(schedule_entry)
-                            all_schedules.append(schedule_entry)
+                            # Create schedule entry for ALL periods (including breaks).
+                            # Only this lightweight tuple is kept; the row dicts are
+                            # built from it in batches when the schedule is inserted
+                            all_schedules.append(_GeneratedPeriod(
+                                cls.id, str(section_num), day_num, period, subject.id, teacher.id
+                            ))
+                            teacher_ids_seen.add(teacher.id)
+                            subject_ids_seen.add(subject.id)
                             total_created += 1
                             self.generation_stats['assignments_created'] += 1
                             
                             # NOTE: Teacher availability update moved to AFTER optimization
                             # to ensure consistency between schedule and free_time_slots
-                        
-                        # Increment day index after processing all periods of the day
-                        day_idx += 1
             
             # Step 7: Apply Constraint Solver to check violations
-            print("\n=== Applying Constraint Solver ===")
+            logger.info("=== Applying Constraint Solver ===")
             active_constraints = self.db.query(ScheduleConstraint).filter(
                 ScheduleConstraint.academic_year_id == request.academic_year_id,
                 ScheduleConstraint.is_active == True
             ).all()
-            print(f"Found {len(active_constraints)} active constraints")
-            
-            # Convert schedules to dict format for constraint checking
-            schedule_assignments = []
-            for schedule in all_schedules:
-                schedule_assignments.append({
-                    'subject_id': schedule.subject_id,
-                    'teacher_id': schedule.teacher_id,
-                    'class_id': schedule.class_id,
-                    'section': schedule.section,
-                    'day_of_week': schedule.day_of_week,
-                    'period_number': schedule.period_number
-                })
+            logger.debug("Found %s active constraints", len(active_constraints))
             
-            # Check each constraint
             all_violations = []
-            for constraint in active_constraints:
-                violations = self.constraint_solver.validate_constraint_with_priority(
-                    constraint, schedule_assignments
-                )
-                all_violations.extend(violations)
+            if active_constraints:
+                # Convert schedules to dict format for constraint checking
+                schedule_assignments = [
+                    {
+                        'subject_id': schedule.subject_id,
+                        'teacher_id': schedule.teacher_id,
+                        'class_id': schedule.class_id,
+                        'section': schedule.section,
+                        'day_of_week': schedule.day_of_week,
+                        'period_number': schedule.period_number
+                    }
+                    for schedule in all_schedules
+                ]
+                
+                # Check each constraint
+                all_violations = self.constraint_solver.validate_batch(active_constraints, schedule_assignments)
             
             # Report violations
             if all_violations:
-                print(f"⚠️ Found {len(all_violations)} constraint violations:")
+                logger.warning("⚠️ Found %s constraint violations:", len(all_violations))
                 for violation in all_violations:
-                    print(f"  - {violation.severity.upper()}: {violation.description}")
+                    logger.debug("  - %s: %s", violation.severity.upper(), violation.description)
                     if violation.severity == "critical":
                         self.conflicts.append(violation.description)
                     else:
@@ -1308,34 +1545,31 @@ class ScheduleGenerationService:
                     error_message = " | ".join([v.description for v in critical_violations])
                     raise ConstraintViolationError(detail=error_message)
             else:
-                print("✅ No constraint violations found")
+                logger.debug("✅ No constraint violations found")
             
-            # Step 8: Apply Genetic Algorithm Optimization (if requested)
-            if len(all_schedules) > 0:
-                print("\n=== Applying Genetic Algorithm Optimization ===")
+            # Step 8: Apply Genetic Algorithm Optimization (if requested and there is
+            # something to optimize against; its result is advisory only)
+            if len(all_schedules) > 0 and active_constraints and not request.skip_optimization:
+                logger.info("=== Applying Genetic Algorithm Optimization ===")
                 try:
-                    # Create ScheduleAssignment objects for optimization
-                    assignments_for_optimization = []
-                    time_slots = []
-                    
-                    for idx, schedule in enumerate(all_schedules):
-                        # Create time slot
-                        time_slot = TimeSlot()
-                        time_slot.id = idx + 1
-                        time_slot.day_of_week = schedule.day_of_week
-                        time_slot.period_number = schedule.period_number
-                        time_slots.append(time_slot)
-                        
-                        # Create assignment
-                        assignment = ScheduleAssignment()
-                        assignment.id = idx + 1
-                        assignment.schedule_id = 1
-                        assignment.time_slot_id = time_slot.id
-                        assignment.subject_id = schedule.subject_id
-                        assignment.teacher_id = schedule.teacher_id
-                        assignment.class_id = schedule.class_id
-                        assignment.section = schedule.section
-                        assignments_for_optimization.append(assignment)
+                    # Build plain genes for optimization; ORM-instrumented ScheduleAssignment
+                    # and TimeSlot objects make every attribute read/write in the GA loop slow
+                    time_slots = [
+                        TimeSlotGene(id=idx + 1, day_of_week=schedule.day_of_week, period_number=schedule.period_number)
+                        for idx, schedule in enumerate(all_schedules)
+                    ]
+                    assignments_for_optimization = [
+                        AssignmentGene(
+                            id=idx + 1,
+                            schedule_id=1,
+                            time_slot_id=idx + 1,
+                            subject_id=schedule.subject_id,
+                            teacher_id=schedule.teacher_id,
+                            class_id=schedule.class_id,
+                            section=schedule.section
+                        )
+                        for idx, schedule in enumerate(all_schedules)
+                    ]
                     
                     # Create optimization constraints
                     optimization_constraints = []
@@ -1357,11 +1591,14 @@ class ScheduleGenerationService:
                         optimization_constraints.append(opt_constraint)
                     
                     # Run optimization with reduced generations for speed
-                    self.genetic_optimizer.generations = 30  # Reduce for performance
+                    # Scale generations with schedule size and stop early on convergence or time budget
+                    self.genetic_optimizer.generations = min(30, max(5, len(all_schedules) // 50))
                     optimized_assignments = self.genetic_optimizer.optimize_schedule(
                         assignments_for_optimization,
                         optimization_constraints,
-                        time_slots
+                        time_slots,
+                        max_seconds=2.0,
+                        patience=5
                     )
                     
                     # IMPORTANT: Do NOT update schedule entries from optimizer
@@ -1373,31 +1610,28 @@ class ScheduleGenerationService:
                     #             all_schedules[i].teacher_id = optimized.teacher_id
                     # Keep ALL original assignments (day, period, subject, teacher) unchanged
                     
-                    print(f"✅ Optimization completed successfully")
-                    self.generation_stats['optimization_rounds'] = 30
+                    logger.debug("✅ Optimization completed successfully")
+                    self.generation_stats['optimization_rounds'] = self.genetic_optimizer.generations_run
                     
                 except Exception as e:
-                    print(f"⚠️ Optimization failed: {e}, continuing with unoptimized schedule")
+                    logger.warning("⚠️ Optimization failed: %s, continuing with unoptimized schedule", e)
                     self.warnings.append(f"فشل تحسين الجدول: {str(e)}")
             
             # Step 9: Update teacher availability AFTER optimization
             # This ensures the free_time_slots match the final optimized schedule
-            print("\n=== Updating Teacher Availability (Post-Optimization) ===")
-            for schedule in all_schedules:
-                try:
-                    self.availability_service.mark_slot_as_assigned(
-                        teacher_id=schedule.teacher_id,
-                        day=schedule.day_of_week - 1,  # Convert to 0-based
-                        period=schedule.period_number - 1,  # Convert to 0-based
-                        subject_id=schedule.subject_id,
-                        class_id=schedule.class_id,
-                        section=schedule.section,
-                        schedule_id=None  # Will be set after commit
-                    )
-                except Exception as e:
-                    print(f"Warning: Failed to update teacher availability: {e}")
-                    self.warnings.append(f"فشل تحديث توفر المعلم (teacher_id={schedule.teacher_id})")
-            print(f"✅ Updated availability for {len(all_schedules)} schedule entries")
+            logger.info("=== Updating Teacher Availability (Post-Optimization) ===")
+            # One grouped update per teacher (day and period converted to 0-based)
+            pending_marks = [
+                (schedule.teacher_id, schedule.day_of_week - 1, schedule.period_number - 1,
+                 schedule.subject_id, schedule.class_id, schedule.section)
+                for schedule in all_schedules
+            ]
+            try:
+                self.availability_service.mark_slots_bulk(pending_marks)
+            except Exception as e:
+                logger.warning("Warning: Failed to update teacher availability: %s", e)
+                self.warnings.append(f"فشل تحديث توفر المعلمين: {str(e)}")
+            logger.debug("✅ Updated availability for %s schedule entries", len(all_schedules))
             
             # Validate generated schedule before committing
             expected_total = sum(
@@ -1423,16 +1657,7 @@ class ScheduleGenerationService:
             # If preview_only, return preview data without saving to database
             if request.preview_only:
                 # Convert schedule entries to dictionaries for preview
-                preview_data = []
-                for schedule in all_schedules:
-                    preview_data.append({
-                        'class_id': schedule.class_id,
-                        'section': schedule.section,
-                        'day_of_week': schedule.day_of_week,
-                        'period_number': schedule.period_number,
-                        'subject_id': schedule.subject_id,
-                        'teacher_id': schedule.teacher_id
-                    })
+                preview_data = [dict(zip(_PREVIEW_FIELDS, _preview_getter(schedule))) for schedule in all_schedules]
                 
                 # Rollback the transaction to not save anything
                 self.db.rollback()
@@ -1456,50 +1681,57 @@ class ScheduleGenerationService:
                     preview_data=preview_data
                 )
             
-            # Commit all schedule entries (only if not preview mode)
-            self.db.commit()
-            
-            # Create generation history record
-            history = ScheduleGenerationHistory()
-            history.academic_year_id = request.academic_year_id
-            history.session_type = request.session_type.value if hasattr(request.session_type, 'value') else str(request.session_type)
-            history.generation_algorithm = "genetic_algorithm_with_constraints"
-            history.generation_parameters = {
-                "periods_per_day": request.periods_per_day,
-                "working_days": [str(d) for d in request.working_days]
-            }
-            history.constraints_count = 0
-            history.conflicts_resolved = 0
-            history.generation_time_seconds = int(generation_time)
-            history.quality_score = 85.0
-            history.status = "success"
-            self.db.add(history)
+            # Insert all schedule entries (only if not preview mode), streaming the
+            # row dicts in fixed-size batches, and commit them together with the
+            # generation history record
+            rows = ({**shared_columns, **entry._asdict()} for entry in all_schedules)
+            while True:
+                batch = list(islice(rows, _INSERT_BATCH_SIZE))
+                if not batch:
+                    break
+                self.db.execute(insert(Schedule), batch)
+            history_id = self.db.execute(
+                insert(ScheduleGenerationHistory).returning(ScheduleGenerationHistory.id),
+                {
+                    'academic_year_id': request.academic_year_id,
+                    'session_type': session_type_value,
+                    'generation_algorithm': "genetic_algorithm_with_constraints",
+                    'generation_parameters': {
+                        "periods_per_day": request.periods_per_day,
+                        "working_days": [str(d) for d in request.working_days]
+                    },
+                    'constraints_count': 0,
+                    'conflicts_resolved': 0,
+                    'generation_time_seconds': int(generation_time),
+                    'quality_score': 85.0,
+                    'status': "success",
+                }
+            ).scalar_one()
             self.db.commit()
+            self.invalidate_cache()
             
             # Print generated schedule in markdown format for review
-            print("\n=== Generated Schedule Output ===")
+            logger.info("=== Generated Schedule Output ===")
+            # Group entries by class, then section, in one pass
+            schedules_by_class_section = defaultdict(lambda: defaultdict(list))
+            for s in all_schedules:
+                schedules_by_class_section[s.class_id][s.section].append(s)
             for cls in classes:
-                class_schedules = [s for s in all_schedules if s.class_id == cls.id]
-                if class_schedules:
-                    # Group by section
-                    sections = set(s.section for s in class_schedules)
-                    for section in sections:
-                        section_schedules = [s for s in class_schedules if s.section == section]
-                        if section_schedules:
-                            class_info = {
-                                'class_name': f"الصف {cls.grade_number} {cls.grade_level}",
-                                'section': section or '1'
-                            }
-                            is_valid = self._print_generated_schedule_markdown(
-                                schedule_entries=section_schedules,
-                                class_info=class_info,
-                                save_to_file=True  # Save to file for review
-                            )
-                            if not is_valid:
-                                print(f"⚠️ تحذير: الجدول يحتوي على تعارضات!")
+                for section, section_schedules in schedules_by_class_section.get(cls.id, {}).items():
+                    class_info = {
+                        'class_name': f"الصف {cls.grade_number} {cls.grade_level}",
+                        'section': section or '1'
+                    }
+                    is_valid = self._print_generated_schedule_markdown(
+                        schedule_entries=section_schedules,
+                        class_info=class_info,
+                        save_to_file=True  # Save to file for review
+                    )
+                    if not is_valid:
+                        logger.warning("⚠️ تحذير: الجدول يحتوي على تعارضات!")
             
             return ScheduleGenerationResponse(
-                schedule_id=history.id if history.id else 0,
+                schedule_id=history_id,
                 generation_status="completed",
                 total_periods_created=total_created,
                 total_assignments_created=total_created,
@@ -1508,39 +1740,39 @@ class ScheduleGenerationService:
                 generation_time=generation_time,
                 summary={
                     'classes_scheduled': len(classes),
-                    'teachers_assigned': len(set(s.teacher_id for s in all_schedules)),
-                    'subjects_covered': len(set(s.subject_id for s in all_schedules)),
+                    'teachers_assigned': len(teacher_ids_seen),
+                    'subjects_covered': len(subject_ids_seen),
                     'optimization_rounds': 1
                 }
             )
             
         except Exception as e:
             # Rollback database transaction
-            print(f"\n!!! Generation failed with error: {str(e)}")
-            print("Rolling back database transaction...")
+            logger.error("!!! Generation failed with error: %s", str(e))
+            logger.debug("Rolling back database transaction...")
             self.db.rollback()
             
             # Restore teacher states
             if teacher_states:
-                print(f"Restoring states for {len(teacher_states)} teachers...")
+                logger.debug("Restoring states for %s teachers...", len(teacher_states))
                 self._restore_teacher_states(teacher_states)
             
-            # Send error notification
-            try:
-                import asyncio
-                asyncio.create_task(
-                    telegram_service.send_system_alert(
-                        "Schedule Generation Error",
-                        f"Failed to generate schedule: {str(e)}",
-                        "error"
+            # Send error notification (this method is sync, so hand it to the notifier's own loop)
+            if telegram_service.enabled:
+                try:
+                    telegram_service.dispatch(
+                        telegram_service.send_system_alert(
+                            "Schedule Generation Error",
+                            f"Failed to generate schedule: {str(e)}",
+                            "error"
+                        )
                     )
-                )
-            except:
-                pass  # Ignore notification errors
+                except Exception as notify_error:
+                    logger.warning("Failed to queue schedule generation alert: %s", notify_error)
             
             # Print full traceback for debugging
             import traceback
-            print(f"Full traceback:\n{traceback.format_exc()}")
+            logger.error("Full traceback:\n%s", traceback.format_exc())
                 
             return ScheduleGenerationResponse(
                 schedule_id=0,
@@ -1593,7 +1825,7 @@ class ScheduleGenerationService:
             
             existing_schedules = base_query.all()
             if existing_schedules:
-                print(f"Deleting existing schedules for class {request.class_id}, section {getattr(request, 'section', None)}: {len(existing_schedules)} rows")
+                logger.debug("Deleting existing schedules for class %s, section %s: %s rows", request.class_id, getattr(request, 'section', None), len(existing_schedules))
                 for existing in existing_schedules:
                     self.db.delete(existing)
                 # Apply deletions before inserting new rows
@@ -1606,75 +1838,82 @@ class ScheduleGenerationService:
                     teacher_ids.add(entry['teacher_id'])
             teacher_states = self._save_teacher_states(list(teacher_ids))
             
-            # Create Schedule objects from preview data
-            all_schedules = []
-            for entry in preview_data:
-                schedule_entry = Schedule()
-                schedule_entry.academic_year_id = request.academic_year_id
-                schedule_entry.session_type = request.session_type.value if hasattr(request.session_type, 'value') else str(request.session_type)
-                schedule_entry.class_id = entry['class_id']
-                schedule_entry.section = entry['section']
-                schedule_entry.day_of_week = entry['day_of_week']
-                schedule_entry.period_number = entry['period_number']
-                schedule_entry.subject_id = entry['subject_id']
-                schedule_entry.teacher_id = entry['teacher_id']
-                schedule_entry.name = request.name  # Add schedule name
-                schedule_entry.start_date = request.start_date  # Add start date
-                schedule_entry.end_date = request.end_date  # Add end date
-                schedule_entry.is_active = True  # Mark as active
-                schedule_entry.status = "published"  # Set status
-                self.db.add(schedule_entry)
-                all_schedules.append(schedule_entry)
-            
-            # Commit all schedule entries first to get IDs
+            # Build plain Schedule rows from preview data
+            shared_columns = {
+                'academic_year_id': request.academic_year_id,
+                'session_type': session_type_value,
+                'name': request.name,
+                'start_date': request.start_date,
+                'end_date': request.end_date,
+                'is_active': True,
+                'status': "published",
+            }
+            schedule_rows = [
+                {
+                    **shared_columns,
+                    'class_id': entry['class_id'],
+                    'section': entry['section'],
+                    'day_of_week': entry['day_of_week'],
+                    'period_number': entry['period_number'],
+                    'subject_id': entry['subject_id'],
+                    'teacher_id': entry['teacher_id'],
+                }
+                for entry in preview_data
+            ]
+            # One executemany instead of a unit-of-work flush per object;
+            # RETURNING hands back the new primary keys in row order
+            schedule_ids = self.db.scalars(
+                insert(Schedule).returning(Schedule.id, sort_by_parameter_order=True),
+                schedule_rows
+            ).all() if schedule_rows else []
+            
+            # Generation history record, committed in the same transaction as the entries
+            history_id = self.db.execute(
+                insert(ScheduleGenerationHistory).returning(ScheduleGenerationHistory.id),
+                {
+                    'academic_year_id': request.academic_year_id,
+                    'session_type': session_type_value,
+                    'generation_algorithm': "preview_save",
+                    'generation_parameters': {
+                        "periods_per_day": request.periods_per_day,
+                        "working_days": [str(d) for d in request.working_days]
+                    },
+                    'constraints_count': 0,
+                    'conflicts_resolved': 0,
+                    'generation_time_seconds': int(time.time() - start_time),
+                    'quality_score': 85.0,
+                    'status': "success",
+                }
+            ).scalar_one()
             self.db.commit()
             
-            # Update teacher free_time_slots to mark slots as assigned
-            for schedule in all_schedules:
-                if schedule.teacher_id:
-                    try:
-                        self.availability_service.mark_slot_as_assigned(
-                            teacher_id=schedule.teacher_id,
-                            day=schedule.day_of_week - 1,  # Convert to 0-based
-                            period=schedule.period_number - 1,  # Convert to 0-based
-                            subject_id=schedule.subject_id,
-                            class_id=schedule.class_id,
-                            section=schedule.section,
-                            schedule_id=schedule.id
-                        )
-                        print(f"Marked teacher {schedule.teacher_id} as assigned for day {schedule.day_of_week} period {schedule.period_number}")
-                    except Exception as e:
-                        print(f"Warning: Failed to mark slot as assigned: {e}")
+            # Update teacher free_time_slots to mark slots as assigned, loading
+            # each teacher once and writing their slots JSON once
+            pending_marks = [
+                (row['teacher_id'], row['day_of_week'] - 1, row['period_number'] - 1,  # 0-based
+                 row['subject_id'], row['class_id'], row['section'], schedule_id)
+                for row, schedule_id in zip(schedule_rows, schedule_ids) if row['teacher_id']
+            ]
+            try:
+                marked = self.availability_service.mark_slots_bulk(pending_marks)
+                logger.debug("Marked %s teacher slots as assigned", marked)
+            except Exception as e:
+                logger.warning("Warning: Failed to mark slots as assigned: %s", e)
             
-            # Create generation history record
             generation_time = time.time() - start_time
-            history = ScheduleGenerationHistory()
-            history.academic_year_id = request.academic_year_id
-            history.session_type = request.session_type.value if hasattr(request.session_type, 'value') else str(request.session_type)
-            history.generation_algorithm = "preview_save"
-            history.generation_parameters = {
-                "periods_per_day": request.periods_per_day,
-                "working_days": [str(d) for d in request.working_days]
-            }
-            history.constraints_count = 0
-            history.conflicts_resolved = 0
-            history.generation_time_seconds = int(generation_time)
-            history.quality_score = 85.0
-            history.status = "success"
-            self.db.add(history)
-            self.db.commit()
+            self.invalidate_cache()
             
             return ScheduleGenerationResponse(
-                schedule_id=history.id if history.id else 0,
+                schedule_id=history_id,
                 generation_status="saved",
-                total_periods_created=len(all_schedules),
-                total_assignments_created=len(all_schedules),
+                total_periods_created=len(schedule_rows),
+                total_assignments_created=len(schedule_rows),
                 conflicts_detected=0,
                 warnings=[],
                 generation_time=generation_time,
                 summary={
                     'classes_scheduled': len(classes),
-                    'total_periods': len(all_schedules),
+                    'total_periods': len(schedule_rows),
                     'preview_saved': True
                 }
             )
@@ -1725,10 +1964,8 @@ class ScheduleGenerationService:
         if working_days is None:
             working_days = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday']
         
-        print("\n" + "="*80)
-        print("=== بدء إنشاء الجداول لجميع الصفوف ===")
-        print(f"السنة الدراسية: {academic_year_id}, الفترة: {session_type}")
-        print("="*80 + "\n")
+        logger.info("=== بدء إنشاء الجداول لجميع الصفوف ===")
+        logger.info("السنة الدراسية: %s, الفترة: %s", academic_year_id, session_type)
         
         # Get all classes for this academic year and session
         classes = self._get_classes_for_academic_year(academic_year_id, session_type, None)
@@ -1740,22 +1977,28 @@ class ScheduleGenerationService:
                 'results': {}
             }
         
-        print(f"عدد الصفوف المراد إنشاء جداول لها: {len(classes)}\n")
+        logger.info("عدد الصفوف المراد إنشاء جداول لها: %s", len(classes))
         
         # Step 1: Check data sufficiency for all classes
-        print("=== التحقق من كفاية البيانات لكل صف ===\n")
+        logger.info("=== التحقق من كفاية البيانات لكل صف ===")
+        
+        # Active subjects for every class, loaded in one query
+        subjects_by_class = defaultdict(list)
+        for subject in self.db.query(Subject).filter(
+            Subject.class_id.in_([cls.id for cls in classes]),
+            Subject.is_active == True
+        ).all():
+            subjects_by_class[subject.class_id].append(subject)
         
         sufficiency_results = {}
+        validation_by_class = {}  # Step-1 validation results, reused in step 2 while still current
         classes_can_proceed = []
         
         for cls in classes:
-            print(f"التحقق من الصف {cls.grade_number} {cls.grade_level}...")
+            logger.debug("التحقق من الصف %s %s...", cls.grade_number, cls.grade_level)
             
             # Get subjects for this class
-            subjects = self.db.query(Subject).filter(
-                Subject.class_id == cls.id,
-                Subject.is_active == True
-            ).all()
+            subjects = subjects_by_class[cls.id]
             
             # Calculate total periods needed
             total_periods = sum(getattr(s, 'weekly_hours', 0) for s in subjects)
@@ -1771,6 +2014,7 @@ class ScheduleGenerationService:
                 session_type=session_type
             )
             
+            validation_by_class[cls.id] = validation_result
             can_proceed = validation_result.get('can_proceed', False)
             is_valid = validation_result.get('is_valid', False)
             
@@ -1790,21 +2034,25 @@ class ScheduleGenerationService:
             
             if can_proceed:
                 classes_can_proceed.append(cls)
-                print(f"  ✅ يمكن المتابعة ({total_periods} حصة من أصل {max_periods})")
+                logger.debug("  ✅ يمكن المتابعة (%s حصة من أصل %s)", total_periods, max_periods)
             else:
-                print(f"  ❌ لا يمكن المتابعة - {', '.join(validation_result.get('errors', ['خطأ غير معروف']))}")
-            
-            print()
+                logger.warning("  ❌ لا يمكن المتابعة - %s", ', '.join(validation_result.get('errors', ['خطأ غير معروف'])))
         
         # Step 2: Generate schedules for classes that can proceed
-        print(f"\n=== إنشاء الجداول ({len(classes_can_proceed)} صف) ===\n")
+        logger.info("=== إنشاء الجداول (%s صف) ===", len(classes_can_proceed))
         
         generation_results = {}
         successful_count = 0
         failed_count = 0
+        # Validation reads teacher free slots, which every completed generation
+        # updates; step-1 results are only reused until that first happens
+        availability_changed = False
+        # One run date shared by every class's schedule
+        start_date = date.today()
+        end_date = start_date + timedelta(days=180)
         
         for cls in classes_can_proceed:
-            print(f"\nإنشاء جدول الصف {cls.grade_number} {cls.grade_level}...")
+            logger.debug("إنشاء جدول الصف %s %s...", cls.grade_number, cls.grade_level)
             
             try:
                 # Create generation request
@@ -1816,26 +2064,30 @@ class ScheduleGenerationService:
                     periods_per_day=periods_per_day,
                     working_days=working_days,
                     name=f"جدول الصف {cls.grade_number} {cls.grade_level}",
-                    start_date=date.today(),
-                    end_date=date.today() + timedelta(days=180)
+                    start_date=start_date,
+                    end_date=end_date
                 )
                 
                 # Use existing validation result
-                validation_result = self.validation_service.validate_schedule_prerequisites(
-                    academic_year_id=academic_year_id,
-                    class_id=cls.id,
-                    session_type=session_type
-                )
+                if availability_changed:
+                    validation_result = self.validation_service.validate_schedule_prerequisites(
+                        academic_year_id=academic_year_id,
+                        class_id=cls.id,
+                        session_type=session_type
+                    )
+                else:
+                    validation_result = validation_by_class[cls.id]
                 
                 # Generate schedule
                 response = self.generate_schedule(request, validation_results=validation_result)
                 
                 if response.generation_status == "completed":
+                    availability_changed = True
                     successful_count += 1
-                    print(f"  ✅ نجح - تم إنشاء {response.total_periods_created} حصة")
+                    logger.debug("  ✅ نجح - تم إنشاء %s حصة", response.total_periods_created)
                 else:
                     failed_count += 1
-                    print(f"  ❌ فشل - {', '.join(response.warnings)}")
+                    logger.warning("  ❌ فشل - %s", ', '.join(response.warnings))
                 
                 generation_results[cls.id] = {
                     'status': response.generation_status,
@@ -1847,7 +2099,7 @@ class ScheduleGenerationService:
                 
             except Exception as e:
                 failed_count += 1
-                print(f"  ❌ خطأ: {str(e)}")
+                logger.error("  ❌ خطأ: %s", str(e))
                 generation_results[cls.id] = {
                     'status': 'failed',
                     'schedule_id': 0,
@@ -1859,14 +2111,12 @@ class ScheduleGenerationService:
         # Step 3: Summary
         total_time = time.time() - start_time
         
-        print("\n" + "="*80)
-        print("=== ملخص إنشاء الجداول ===")
-        print(f"إجمالي الصفوف: {len(classes)}")
-        print(f"الصفوف التي يمكن المتابعة: {len(classes_can_proceed)}")
-        print(f"الجداول الناجحة: {successful_count}")
-        print(f"الجداول الفاشلة: {failed_count}")
-        print(f"الوقت الإجمالي: {round(total_time, 2)} ثانية")
-        print("="*80 + "\n")
+        logger.info("=== ملخص إنشاء الجداول ===")
+        logger.info("إجمالي الصفوف: %s", len(classes))
+        logger.info("الصفوف التي يمكن المتابعة: %s", len(classes_can_proceed))
+        logger.info("الجداول الناجحة: %s", successful_count)
+        logger.info("الجداول الفاشلة: %s", failed_count)
+        logger.info("الوقت الإجمالي: %s ثانية", round(total_time, 2))
         
         return {
             'success': True,
@@ -1883,28 +2133,29 @@ class ScheduleGenerationService:
         """Create the base schedule record"""
         # Create a dummy schedule entry to get an ID
         # In a real implementation, this might be a schedule generation record
-        schedule = Schedule()
-        schedule.academic_year_id = request.academic_year_id
-        schedule.session_type = request.session_type.value if hasattr(request.session_type, 'value') else "morning"
-        schedule.class_id = 1  # Dummy value
-        schedule.day_of_week = 1  # Dummy value
-        schedule.period_number = 1  # Dummy value
-        schedule.subject_id = 1  # Dummy value
-        schedule.teacher_id = 1  # Dummy value
-        schedule.name = request.name
-        schedule.start_date = request.start_date
-        schedule.end_date = request.end_date
-        schedule.is_active = getattr(request, 'is_active', True)
-        schedule.description = f"Generated schedule for {request.name}"
+        schedule = Schedule(
+            academic_year_id=request.academic_year_id,
+            session_type=request.session_type.value if hasattr(request.session_type, 'value') else "morning",
+            class_id=1,  # Dummy value
+            day_of_week=1,  # Dummy value
+            period_number=1,  # Dummy value
+            subject_id=1,  # Dummy value
+            teacher_id=1,  # Dummy value
+            name=request.name,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            is_active=getattr(request, 'is_active', True),
+            description=f"Generated schedule for {request.name}",
+        )
         
+        # Flush only to allocate the id the time slots and assignments reference;
+        # the row is committed together with the time slots
         self.db.add(schedule)
-        self.db.commit()
-        self.db.refresh(schedule)
+        self.db.flush()
         return schedule
     
     def _generate_time_slots(self, schedule: Schedule, request: ScheduleGenerationRequest) -> List[TimeSlot]:
         """Generate time slots based on request parameters"""
-        time_slots = []
         # Parse session_start_time string to time object
         if isinstance(request.session_start_time, str):
             parts = request.session_start_time.split(':')
@@ -1914,39 +2165,46 @@ class ScheduleGenerationService:
         else:
             current_time = request.session_start_time
         
-        for day in request.working_days:
+        # Build plain rows first and insert them in one statement; RETURNING hands
+        # back the TimeSlot instances (ids included) in row order
+        time_slot_rows = []
+        schedule_id = schedule.id
+        # Resolve each working day's stored value once rather than per period
+        day_values = [day.value if hasattr(day, 'value') else 1 for day in request.working_days]
+        for day_value in day_values:
             period_time = current_time
             
             for period in range(1, request.periods_per_day + 1):
                 # Create regular period
                 end_time = self._add_minutes(period_time, request.period_duration)
-                
-                time_slot = TimeSlot()
-                time_slot.schedule_id = schedule.id
-                time_slot.period_number = period
-                time_slot.start_time = period_time
-                time_slot.end_time = end_time
-                time_slot.day_of_week = day.value if hasattr(day, 'value') else 1
-                time_slot.is_break = False
-                self.db.add(time_slot)
-                time_slots.append(time_slot)
+                time_slot_rows.append({
+                    'schedule_id': schedule_id,
+                    'period_number': period,
+                    'start_time': period_time,
+                    'end_time': end_time,
+                    'day_of_week': day_value,
+                    'is_break': False,
+                })
                 period_time = end_time
                 
                 # Add break if needed
                 if period in request.break_periods:
                     break_end_time = self._add_minutes(period_time, request.break_duration)
-                    break_slot = TimeSlot()
-                    break_slot.schedule_id = schedule.id
-                    break_slot.period_number = period
-                    break_slot.start_time = period_time
-                    break_slot.end_time = break_end_time
-                    break_slot.day_of_week = day.value if hasattr(day, 'value') else 1
-                    break_slot.is_break = True
-                    break_slot.break_name = f"Break {period}"
-                    self.db.add(break_slot)
-                    time_slots.append(break_slot)
+                    time_slot_rows.append({
+                        'schedule_id': schedule_id,
+                        'period_number': period,
+                        'start_time': period_time,
+                        'end_time': break_end_time,
+                        'day_of_week': day_value,
+                        'is_break': True,
+                        'break_name': f"Break {period}",
+                    })
                     period_time = break_end_time
         
+        time_slots = list(self.db.scalars(
+            insert(TimeSlot).returning(TimeSlot, sort_by_parameter_order=True),
+            time_slot_rows
+        )) if time_slot_rows else []
         self.db.commit()
         self.generation_stats['periods_created'] = len(time_slots)
         return time_slots
@@ -1963,6 +2221,12 @@ class ScheduleGenerationService:
         # Filter out break periods
         teaching_slots = [slot for slot in time_slots if not slot.is_break]
         
+        # Teacher/room bookings and teacher loads span every class of the run, so
+        # placement can reject conflicting choices instead of leaving them to the optimizer
+        self._assigned_by_slot = defaultdict(set)
+        self._rooms_by_slot = defaultdict(set)
+        self._teacher_load = Counter()
+        
         for class_obj in classes:
             class_assignments = self._assign_subjects_to_class(
                 schedule, class_obj, teaching_slots, 
@@ -1987,36 +2251,54 @@ class ScheduleGenerationService:
             
             # Find best teacher for this subject
             suitable_teachers = self._find_suitable_teachers(subject_id, teachers)
+            auto_assign = request.auto_assign_teachers and suitable_teachers
+            room = self._suggest_room(class_obj, subject_id)
             
+            # First pass takes only slots where a teacher is free and the room is unused;
+            # the second fills whatever is still needed from the remaining slots
             slots_assigned = 0
-            for time_slot in time_slots:
-                if slots_assigned >= periods_needed:
-                    break
-                
-                slot_key = (time_slot.day_of_week, time_slot.period_number)
-                if slot_key in used_slots:
-                    continue
-                
-                # Try to assign a teacher
-                assigned_teacher = None
-                if request.auto_assign_teachers and suitable_teachers:
-                    assigned_teacher = self._select_best_teacher(
-                        suitable_teachers, time_slot, assignments, request
+            for feasible_only in (True, False):
+                for time_slot in time_slots:
+                    if slots_assigned >= periods_needed:
+                        break
+                    
+                    slot_key = (time_slot.day_of_week, time_slot.period_number)
+                    if slot_key in used_slots:
+                        continue
+                    if feasible_only and room in self._rooms_by_slot[time_slot.id]:
+                        continue
+                    
+                    # Try to assign a teacher
+                    assigned_teacher = None
+                    if auto_assign:
+                        assigned_teacher = self._select_best_teacher(
+                            suitable_teachers, time_slot, self._teacher_load, request
+                        )
+                        if feasible_only and assigned_teacher is None:
+                            continue
+                    
+                    assignment = ScheduleAssignment(
+                        schedule_id=schedule.id,
+                        time_slot_id=time_slot.id,
+                        class_id=class_obj.id,
+                        subject_id=subject_id,
+                        teacher_id=assigned_teacher.id if assigned_teacher else None,
+                        room=room
                     )
+                    assignments.append(assignment)
+                    if assignment.teacher_id:
+                        self._assigned_by_slot[time_slot.id].add(assignment.teacher_id)
+                        self._teacher_load[assignment.teacher_id] += 1
+                    self._rooms_by_slot[time_slot.id].add(room)
+                    used_slots.add(slot_key)
+                    slots_assigned += 1
                 
-                assignment = ScheduleAssignment()
-                assignment.schedule_id = schedule.id
-                assignment.time_slot_id = time_slot.id
-                assignment.class_id = class_obj.id
-                assignment.subject_id = subject_id
-                assignment.teacher_id = assigned_teacher.id if assigned_teacher else None
-                assignment.room = self._suggest_room(class_obj, subject_id)
-                
-                self.db.add(assignment)
-                assignments.append(assignment)
-                used_slots.add(slot_key)
-                slots_assigned += 1
+                if slots_assigned >= periods_needed:
+                    break
         
+        # The optimizer edits these objects in place afterwards, so they stay ORM
+        # instances; adding them together lets the flush batch the INSERTs
+        self.db.add_all(assignments)
         self.db.commit()
         return assignments
     
@@ -2026,6 +2308,16 @@ class ScheduleGenerationService:
         optimization_rounds = 0
         max_rounds = 5
         
+        # Optimization moves periods and swaps teachers but never changes an
+        # assignment's class or subject, so the continuity groups are built once
+        continuity_groups = []
+        if request.prefer_subject_continuity:
+            class_subjects = defaultdict(list)
+            for assignment in assignments:
+                class_subjects[(assignment.class_id, assignment.subject_id)].append(assignment)
+            # Only optimize if subject has 3+ periods
+            continuity_groups = [group for group in class_subjects.values() if len(group) >= 3]
+        
         while optimization_rounds < max_rounds:
             improved = False
             
@@ -2038,7 +2330,7 @@ class ScheduleGenerationService:
                     improved = True
             
             if request.prefer_subject_continuity:
-                if self._improve_subject_continuity(assignments):
+                if self._improve_subject_continuity(continuity_groups):
                     improved = True
             
             optimization_rounds += 1
@@ -2053,20 +2345,20 @@ class ScheduleGenerationService:
         conflicts_found = {}
         improved = False
         
+        slot_by_id = self._load_time_slots(assignments)
+        
         # Group assignments by teacher and time
         for assignment in assignments:
             if not assignment.teacher_id:
                 continue
                 
-            query_result = self.db.query(TimeSlot).filter(TimeSlot.id == assignment.time_slot_id)
-            if query_result is not None:
-                time_slot = query_result.first()
-                if time_slot is not None:
-                    key = (assignment.teacher_id, time_slot.day_of_week, time_slot.period_number)
-                    
-                    if key not in conflicts_found:
-                        conflicts_found[key] = []
-                    conflicts_found[key].append(assignment)
+            time_slot = slot_by_id.get(assignment.time_slot_id)
+            if time_slot is not None:
+                key = (assignment.teacher_id, time_slot.day_of_week, time_slot.period_number)
+                
+                if key not in conflicts_found:
+                    conflicts_found[key] = []
+                conflicts_found[key].append(assignment)
         
         # Resolve conflicts by reassigning teachers
         for key, conflicted_assignments in conflicts_found.items():
@@ -2076,31 +2368,35 @@ class ScheduleGenerationService:
                     new_teacher = self._find_alternative_teacher(assignment)
                     if new_teacher:
                         assignment.teacher_id = new_teacher.id
-                        self.db.commit()
+                        # Flush so the next alternative-teacher lookup sees this reassignment;
+                        # the transaction itself is committed once below
+                        self.db.flush()
                         improved = True
                     else:
                         assignment.teacher_id = None
                         if hasattr(assignment, 'id'):
                             self.warnings.append(f"Could not assign teacher for assignment {assignment.id}")
         
+        if improved:
+            self.db.commit()
         return improved
     
     def _balance_teacher_workload(self, assignments: List[ScheduleAssignment]) -> bool:
         """Balance workload across teachers"""
-        teacher_loads = {}
-        
-        # Calculate current loads
-        for assignment in assignments:
-            if assignment.teacher_id:
-                teacher_loads[assignment.teacher_id] = teacher_loads.get(assignment.teacher_id, 0) + 1
+        teacher_loads = Counter(a.teacher_id for a in assignments if a.teacher_id)
         
         if not teacher_loads:
             return False
         
-        # Find overloaded and underloaded teachers
+        # Find overloaded and underloaded teachers in one pass over the loads
         avg_load = sum(teacher_loads.values()) / len(teacher_loads)
-        overloaded = [(tid, load) for tid, load in teacher_loads.items() if load > avg_load * 1.5]
-        underloaded = [(tid, load) for tid, load in teacher_loads.items() if load < avg_load * 0.5]
+        high, low = avg_load * 1.5, avg_load * 0.5
+        overloaded, underloaded = [], []
+        for tid, load in teacher_loads.items():
+            if load > high:
+                overloaded.append((tid, load))
+            elif load < low:
+                underloaded.append((tid, load))
         
         improved = False
         for overloaded_teacher, _ in overloaded:
@@ -2112,120 +2408,122 @@ class ScheduleGenerationService:
         
         return improved
     
-    def _improve_subject_continuity(self, assignments: List[ScheduleAssignment]) -> bool:
-        """Improve subject distribution for better learning continuity"""
-        # Group assignments by class and subject
-        class_subjects = {}
-        
-        for assignment in assignments:
-            key = (assignment.class_id, assignment.subject_id)
-            if key not in class_subjects:
-                class_subjects[key] = []
-            class_subjects[key].append(assignment)
+    def _improve_subject_continuity(self, subject_groups: List[List[ScheduleAssignment]]) -> bool:
+        """Improve subject distribution for better learning continuity
         
+        subject_groups holds one list of assignments per (class, subject) pair.
+        """
         improved = False
+        # Time slots of every group, loaded in one query for the whole round;
+        # each group only moves its own assignments, so the map stays valid
+        slot_by_id = self._load_time_slots(list(chain.from_iterable(subject_groups)))
         
         # Try to distribute subjects more evenly across days
-        for (class_id, subject_id), subject_assignments in class_subjects.items():
-            if len(subject_assignments) >= 3:  # Only optimize if subject has 3+ periods
-                if self._redistribute_subject_periods(subject_assignments):
-                    improved = True
+        for subject_assignments in subject_groups:
+            if self._redistribute_subject_periods(subject_assignments, slot_by_id):
+                improved = True
         
+        if improved:
+            self.db.commit()
         return improved
     
     def _detect_conflicts(self, schedule: Schedule, assignments: List[ScheduleAssignment]):
         """Detect and log schedule conflicts"""
-        conflicts = []
+        slot_by_id = self._load_time_slots(assignments)
         
-        # Teacher conflicts
-        teacher_schedule = {}
+        # One pass buckets assignment IDs by (teacher|room, day, period); every
+        # assignment after the first in a bucket conflicts with that first one
+        teacher_schedule = defaultdict(list)
+        room_schedule = defaultdict(list)
         for assignment in assignments:
-            if not assignment.teacher_id:
-                continue
-                
-            try:
-                # Get time slot for this assignment
-                time_slot = None
-                query = self.db.query(TimeSlot)
-                if query is not None:
-                    filtered_query = query.filter(TimeSlot.id == assignment.time_slot_id)
-                    if filtered_query is not None:
-                        time_slot = filtered_query.first()
-                
-                if time_slot is not None:
-                    key = (assignment.teacher_id, time_slot.day_of_week, time_slot.period_number)
-                    
-                    if key in teacher_schedule:
-                        conflict = ScheduleConflict()
-                        conflict.schedule_id = schedule.id
-                        conflict.conflict_type = "teacher_double_booking"
-                        conflict.severity = "high"
-                        conflict.description = f"Teacher {assignment.teacher_id} assigned to multiple classes at same time"
-                        conflict.affected_assignments = str([teacher_schedule[key], assignment.id])  # Convert to JSON string
-                        conflict.resolution_suggestions = str(["Reassign one of the classes to different teacher", "Move one assignment to different time slot"])  # Convert to JSON string
-                        conflicts.append(conflict)
-                    else:
-                        teacher_schedule[key] = assignment.id
-            except Exception:
-                # Skip this assignment if there's an error
-                continue
-        
-        # Room conflicts (if rooms are specified)
-        room_schedule = {}
-        for assignment in assignments:
-            if not assignment.room:
-                continue
-                
-            try:
-                # Get time slot for this assignment
-                time_slot = None
-                query = self.db.query(TimeSlot)
-                if query is not None:
-                    filtered_query = query.filter(TimeSlot.id == assignment.time_slot_id)
-                    if filtered_query is not None:
-                        time_slot = filtered_query.first()
-                
-                if time_slot is not None:
-                    key = (assignment.room, time_slot.day_of_week, time_slot.period_number)
-                    
-                    if key in room_schedule:
-                        conflict = ScheduleConflict()
-                        conflict.schedule_id = schedule.id
-                        conflict.conflict_type = "room_conflict"
-                        conflict.severity = "medium"
-                        conflict.description = f"Room {assignment.room} assigned to multiple classes at same time"
-                        conflict.affected_assignments = str([room_schedule[key], assignment.id])  # Convert to JSON string
-                        conflict.resolution_suggestions = str(["Assign different room to one class", "Move one assignment to different time slot"])  # Convert to JSON string
-                        conflicts.append(conflict)
-                    else:
-                        room_schedule[key] = assignment.id
-            except Exception:
-                # Skip this assignment if there's an error
+            time_slot = slot_by_id.get(assignment.time_slot_id)
+            if time_slot is None:
                 continue
+            slot_key = (time_slot.day_of_week, time_slot.period_number)
+            if assignment.teacher_id:
+                teacher_schedule[(assignment.teacher_id, *slot_key)].append(assignment.id)
+            if assignment.room:  # Rooms are optional
+                room_schedule[(assignment.room, *slot_key)].append(assignment.id)
+        
+        conflicts = [
+            ScheduleConflict(
+                schedule_id=schedule.id,
+                conflict_type="teacher_double_booking",
+                severity="high",
+                description=f"Teacher {teacher_id} assigned to multiple classes at same time",
+                affected_assignments=str([assignment_ids[0], assignment_id]),  # Convert to JSON string
+                resolution_suggestions=str(["Reassign one of the classes to different teacher", "Move one assignment to different time slot"])  # Convert to JSON string
+            )
+            for (teacher_id, _, _), assignment_ids in teacher_schedule.items()
+            for assignment_id in assignment_ids[1:]
+        ]
+        conflicts.extend(
+            ScheduleConflict(
+                schedule_id=schedule.id,
+                conflict_type="room_conflict",
+                severity="medium",
+                description=f"Room {room} assigned to multiple classes at same time",
+                affected_assignments=str([assignment_ids[0], assignment_id]),  # Convert to JSON string
+                resolution_suggestions=str(["Assign different room to one class", "Move one assignment to different time slot"])  # Convert to JSON string
+            )
+            for (room, _, _), assignment_ids in room_schedule.items()
+            for assignment_id in assignment_ids[1:]
+        )
         
         # Save conflicts
-        for conflict in conflicts:
-            self.db.add(conflict)
+        self.db.add_all(conflicts)
         self.db.commit()
         
         self.generation_stats['conflicts_detected'] = len(conflicts)
         self.conflicts = conflicts
     
     # Helper methods
+    def _load_time_slots(self, assignments: List[ScheduleAssignment]) -> Dict[int, TimeSlot]:
+        """Load the time slots referenced by assignments in one query, keyed by ID"""
+        time_slot_ids = {assignment.time_slot_id for assignment in assignments}
+        if not time_slot_ids:
+            return {}
+        return {
+            slot.id: slot
+            for slot in self.db.query(TimeSlot).filter(TimeSlot.id.in_(time_slot_ids)).all()
+        }
+    
     def _add_minutes(self, time_obj: dt_time, minutes: int) -> dt_time:
         """Add minutes to a time object"""
         dt = datetime.combine(date.today(), time_obj)
         dt += timedelta(minutes=minutes)
         return dt.time()
     
+    def invalidate_cache(self):
+        """Drop memoized class, subject and teacher lookups"""
+        self._lookup_cache.clear()
+    
+    def _cached_lookup(self, key: tuple, loader) -> list:
+        """
+        Return loader() memoized under key for _LOOKUP_CACHE_TTL seconds
+        
+        Empty results (including the loaders' error fallbacks) are not cached.
+        """
+        now = time.monotonic()
+        cached = self._lookup_cache.get(key)
+        if cached and now - cached[0] < _LOOKUP_CACHE_TTL:
+            return cached[1]
+        rows = loader()
+        if rows:
+            self._lookup_cache[key] = (now, rows)
+        return rows
+    
     def _get_classes_for_academic_year(self, academic_year_id: int, session_type, class_id: Optional[int] = None) -> List[Class]:
         """Get classes for the academic year and session"""
+        session_value = session_type.value if hasattr(session_type, 'value') else session_type
+        return self._cached_lookup(
+            ('classes', academic_year_id, session_value, class_id),
+            lambda: self._load_classes_for_academic_year(academic_year_id, session_type, class_id)
+        )
+    
+    def _load_classes_for_academic_year(self, academic_year_id: int, session_type, class_id: Optional[int] = None) -> List[Class]:
+        """Query classes for the academic year and session"""
         try:
-            # Build the query step by step
-            query = self.db.query(Class)
-            if query is None:
-                return []
-            
             # Apply filters
             filters = [Class.academic_year_id == academic_year_id]
             
@@ -2244,57 +2542,41 @@ class ScheduleGenerationService:
             if class_id:
                 filters.append(Class.id == class_id)
             
-            filtered_query = query.filter(and_(*filters))
-            if filtered_query is None:
-                return []
-            
-            result = filtered_query.all()
-            return result if result is not None else []
+            return self.db.query(Class).filter(and_(*filters)).all()
         except Exception as e:
-            print(f"Error getting classes: {e}")
+            logger.error("Error getting classes: %s", e)
             return []
     
     def _get_subjects(self) -> List[Subject]:
         """Get all subjects"""
+        return self._cached_lookup(('subjects',), self._load_subjects)
+    
+    def _load_subjects(self) -> List[Subject]:
+        """Query all active subjects"""
         try:
-            query = self.db.query(Subject)
-            if query is None:
-                return []
-            
-            filtered_query = query.filter(Subject.is_active == True)
-            if filtered_query is None:
-                return []
-            
-            result = filtered_query.all()
-            return result if result is not None else []
+            return self.db.query(Subject).filter(Subject.is_active == True).all()
         except Exception:
             return []
     
     def _find_teacher_for_subject(self, subject_id: int, teachers: List[Teacher]) -> Optional[Teacher]:
         """Find a suitable teacher for the given subject"""
         if not teachers:
-            print(f"Warning: No teachers available")
+            logger.warning("No teachers available")
             return None
             
+        try:
+            assigned_teacher_ids = set(self._get_subject_teacher_index().get(subject_id, ()))
+        except Exception as e:
+            logger.error("Error loading teacher assignments: %s", e)
+            assigned_teacher_ids = set()
+        
         # Try to find a teacher assigned to this subject
         for teacher in teachers:
-            try:
-                # Check if teacher has TeacherAssignment for this subject
-                assignment = self.db.query(TeacherAssignment).filter(
-                    and_(
-                        TeacherAssignment.teacher_id == teacher.id,
-                        TeacherAssignment.subject_id == subject_id
-                    )
-                ).first()
-                
-                if assignment:
-                    print(f"Found teacher {teacher.full_name} for subject {subject_id}")
-                    return teacher
-            except Exception as e:
-                print(f"Error checking teacher {teacher.id}: {e}")
-                continue
+            if teacher.id in assigned_teacher_ids:
+                logger.debug("Found teacher %s for subject %s", teacher.full_name, subject_id)
+                return teacher
         
-        print(f"Warning: No specific teacher found for subject {subject_id}, returning first available")
+        logger.warning("No specific teacher found for subject %s, returning first available", subject_id)
         # If no specific assignment found, return first available teacher
         return teachers[0] if teachers else None
     
@@ -2321,36 +2603,38 @@ class ScheduleGenerationService:
             Teacher with most available slots, or None if none available
         """
         if not teachers:
-            print(f"Warning: No teachers available")
+            logger.warning("Warning: No teachers available")
             return None
         
-        # Get teachers assigned to this subject
-        suitable_teachers = []
-        for teacher in teachers:
-            try:
-                assignment = self.db.query(TeacherAssignment).filter(
-                    and_(
-                        TeacherAssignment.teacher_id == teacher.id,
-                        TeacherAssignment.subject_id == subject_id
-                    )
-                ).first()
-                
-                if assignment:
-                    suitable_teachers.append(teacher)
-            except Exception as e:
-                print(f"Error checking teacher {teacher.id}: {e}")
-                continue
+        # Get teachers assigned to this subject, with one query for all of them
+        assigned_ids = {
+            teacher_id for (teacher_id,) in self.db.query(TeacherAssignment.teacher_id).filter(
+                TeacherAssignment.subject_id == subject_id,
+                TeacherAssignment.teacher_id.in_({teacher.id for teacher in teachers})
+            ).all()
+        }
+        suitable_teachers = [teacher for teacher in teachers if teacher.id in assigned_ids]
         
         if not suitable_teachers:
-            print(f"Warning: No teachers assigned to subject {subject_id}")
+            logger.warning("Warning: No teachers assigned to subject %s", subject_id)
             return None
         
-        # Check availability for each suitable teacher
+        # Check availability for each suitable teacher, read for all of them at once
+        availabilities = self.availability_service.get_teacher_availability_bulk(
+            [teacher.id for teacher in suitable_teachers]
+        )
+        # The subject's class decides whether a busy slot can be shared across sections
+        subject = self.db.query(Subject).filter(Subject.id == subject_id).first()
+        # Classes each teacher already teaches at this day/period, indexed once
+        # instead of scanning existing_schedules for every teacher
+        busy_classes = defaultdict(set)
+        for schedule in existing_schedules:
+            if schedule.day_of_week == day and schedule.period_number == period:
+                busy_classes[schedule.teacher_id].add(schedule.class_id)
         available_teachers = []
         for teacher in suitable_teachers:
             try:
-                # Get teacher's availability
-                availability = self.availability_service.get_teacher_availability(teacher.id)
+                availability = availabilities.get(teacher.id, {'slots': [], 'total_free': 0})
                 slots = availability.get('slots', [])
                 
                 # Convert day/period to slot index (day is 1-based, period is 1-based)
@@ -2361,7 +2645,7 @@ class ScheduleGenerationService:
                 
                 # Check if slot index is valid
                 if slot_index < 0 or slot_index >= len(slots):
-                    print(f"Invalid slot index {slot_index} for teacher {teacher.full_name}")
+                    logger.debug("Invalid slot index %s for teacher %s", slot_index, teacher.full_name)
                     continue
                 
                 # Check if slot is free or assigned to same class
@@ -2382,120 +2666,103 @@ class ScheduleGenerationService:
                     # Check if assigned to same class - if so, can be reused for different section
                     assignment_info = slot.get('assignment', {})
                     assigned_class_id = assignment_info.get('class_id')
-                    # Get the class for this subject
-                    subject = self.db.query(Subject).filter(Subject.id == subject_id).first()
                     if subject and subject.class_id == assigned_class_id:
                         # Same class - teacher can teach different section at same slot
                         is_free = True
-                        print(f"  -> Slot assigned to same class, reusing for different section")
+                        logger.debug("  -> Slot assigned to same class, reusing for different section")
                 
-                print(f"DEBUG: Teacher {teacher.full_name}, day={day}, period={period}, slot_index={slot_index}")
-                print(f"  Slot data: {slot}")
-                print(f"  status={slot_status}, is_free={slot_is_free}, has_assignment={slot_has_assignment}")
-                print(f"  RESULT: is_free={is_free}")
+                logger.debug(
+                    "Teacher %s, day=%s, period=%s, slot_index=%s: status=%s, is_free=%s, has_assignment=%s -> is_free=%s",
+                    teacher.full_name, day, period, slot_index, slot_status, slot_is_free, slot_has_assignment, is_free
+                )
+                logger.debug("  Slot data: %s", slot)
                 
                 if not is_free:
-                    print(f"  -> Teacher {teacher.full_name} NOT FREE at day {day} period {period}")
+                    logger.debug("  -> Teacher %s NOT FREE at day %s period %s", teacher.full_name, day, period)
                     continue
                 
-                print(f"  -> Teacher {teacher.full_name} IS FREE at day {day} period {period}")
+                logger.debug("  -> Teacher %s IS FREE at day %s period %s", teacher.full_name, day, period)
                 
                 # Check for conflicts in existing schedules
                 # Allow same teacher for different sections of the same class
                 # Only conflict if teaching a DIFFERENT class at the same time
-                has_conflict = False
-                for schedule in existing_schedules:
-                    if (schedule.teacher_id == teacher.id and 
-                        schedule.day_of_week == day and 
-                        schedule.period_number == period):
-                        # Check if it's a different class - if so, it's a real conflict
-                        # If it's the same class but different section, it's allowed
-                        # (Different sections of the same class can be taught by the same teacher at the same slot position)
-                        current_class_id = schedule.class_id
-                        # We need to check which class we're currently generating for
-                        # This is passed implicitly through the context
-                        # For now, if there's ANY existing schedule, check if it's a different class
-                        # We'll get the class context from the subject
-                        subject = self.db.query(Subject).filter(Subject.id == subject_id).first()
-                        if subject and subject.class_id != current_class_id:
-                            has_conflict = True
-                            print(f"Teacher {teacher.full_name} has conflict: teaching different class at day {day} period {period}")
-                            break
-                        else:
-                            # Same class, different section - this is OK
-                            print(f"Teacher {teacher.full_name} teaching same class (different section) at day {day} period {period} - allowed")
-                            continue
+                teacher_busy_classes = busy_classes.get(teacher.id)
+                has_conflict = bool(
+                    subject and teacher_busy_classes and teacher_busy_classes - {subject.class_id}
+                )
+                if has_conflict:
+                    logger.debug("Teacher %s has conflict: teaching different class at day %s period %s", teacher.full_name, day, period)
+                elif teacher_busy_classes:
+                    # Same class, different section - this is OK
+                    logger.debug("Teacher %s teaching same class (different section) at day %s period %s - allowed", teacher.full_name, day, period)
                 
                 if not has_conflict:
                     available_teachers.append({
                         'teacher': teacher,
                         'available_slots': availability.get('total_free', 0)
                     })
-                    print(f"Teacher {teacher.full_name} is available at day {day} period {period}")
+                    logger.debug("Teacher %s is available at day %s period %s", teacher.full_name, day, period)
             except Exception as e:
-                print(f"Error checking availability for teacher {teacher.id}: {e}")
+                logger.error("Error checking availability for teacher %s: %s", teacher.id, e)
                 continue
         
         # Return teacher with most available slots
         if available_teachers:
             best_teacher = max(available_teachers, key=lambda x: x['available_slots'])
-            print(f"Selected teacher {best_teacher['teacher'].full_name} with {best_teacher['available_slots']} free slots")
+            logger.debug("Selected teacher %s with %s free slots", best_teacher['teacher'].full_name, best_teacher['available_slots'])
             return best_teacher['teacher']
         
-        print(f"No available teachers found for subject {subject_id} at day {day} period {period}")
+        logger.debug("No available teachers found for subject %s at day %s period %s", subject_id, day, period)
         return None
     
     def _get_available_teachers(self, session_type: SessionType) -> List[Teacher]:
         """Get teachers available for the session"""
+        session_value = session_type.value if hasattr(session_type, 'value') else session_type
+        return self._cached_lookup(('teachers', session_value), lambda: self._load_available_teachers(session_type))
+    
+    def _load_available_teachers(self, session_type: SessionType) -> List[Teacher]:
+        """Query teachers available for the session"""
         try:
-            query = self.db.query(Teacher)
-            if query is None:
-                return []
-            
             # Get all active teachers - don't filter by transportation_type
             # as it may not be reliable or set correctly
-            filtered_query = query.filter(Teacher.is_active == True)
-            
-            if filtered_query is None:
-                return []
-            
-            result = filtered_query.all()
-            return result if result is not None else []
+            return self.db.query(Teacher).options(load_only(*_TEACHER_SCHEDULING_COLUMNS)).filter(
+                Teacher.is_active == True
+            ).all()
         except Exception as e:
-            print(f"Error getting available teachers: {e}")
+            logger.error("Error getting available teachers: %s", e)
             return []
     
     def _get_class_subject_requirements(self, classes: List[Class], subjects: List[Subject]) -> Dict[int, List[Dict]]:
         """Get subject requirements for each class"""
         requirements = {}
         
-        # Get actual subject requirements from database
+        # Get actual subject requirements from database - one query for all classes
+        subjects_by_class = defaultdict(list)
+        try:
+            class_subjects = self.db.query(Subject).filter(
+                Subject.class_id.in_([class_obj.id for class_obj in classes])
+            ).yield_per(500)
+            for subject in class_subjects:
+                subjects_by_class[subject.class_id].append(subject)
+        except Exception:
+            # If there's an error, continue with empty requirements for every class
+            pass
+        
         for class_obj in classes:
             class_requirements = []
             
-            # Get subjects for this class
-            try:
-                query = self.db.query(Subject)
-                if query is not None:
-                    filtered_query = query.filter(Subject.class_id == class_obj.id)
-                    if filtered_query is not None:
-                        class_subjects = filtered_query.all()
-                        if class_subjects is not None:
-                            # For each subject, determine required periods per week from curriculum data
-                            # In a real implementation, this would come from a curriculum table
-                            # For now, we'll implement a more sophisticated approach based on educational standards
-                            for subject in class_subjects:
-                                # Get curriculum data for this subject and class level
-                                periods = self._get_curriculum_periods(subject.subject_name, class_obj.grade_level, class_obj.grade_number)
-                                
-                                class_requirements.append({
-                                    "subject_id": subject.id,
-                                    "periods_per_week": periods,
-                                    "name": subject.subject_name
-                                })
-            except Exception:
-                # If there's an error, continue with empty requirements for this class
-                pass
+            # For each subject, determine required periods per week from curriculum data
+            # In a real implementation, this would come from a curriculum table
+            # For now, we'll implement a more sophisticated approach based on educational standards
+            for subject in subjects_by_class[class_obj.id]:
+                # Get curriculum data for this subject and class level
+                periods = self._get_curriculum_periods(subject.subject_name, class_obj.grade_level, class_obj.grade_number)
+                
+                class_requirements.append({
+                    "subject_id": subject.id,
+                    "periods_per_week": periods,
+                    "name": subject.subject_name
+                })
             
             requirements[class_obj.id] = class_requirements
         
@@ -2503,48 +2770,24 @@ class ScheduleGenerationService:
     
     def _get_curriculum_periods(self, subject_name: str, grade_level: str, grade_number: int) -> int:
         """Get required periods per week based on curriculum standards"""
-        # This would normally query a curriculum table with educational standards
-        # For now, we'll implement a more realistic estimation based on educational best practices
-        
-        subject_name_lower = subject_name.lower()
-        
-        # Core subjects typically get more periods
-        if any(core in subject_name_lower for core in ['math', 'arabic', 'english']):
-            if grade_level == 'primary':
-                return 5 if grade_number <= 3 else 4
-            elif grade_level == 'intermediate':
-                return 4
-            else:  # secondary
-                return 5 if 'math' in subject_name_lower else 4
-        
-        # Science subjects
-        elif any(science in subject_name_lower for science in ['science', 'biology', 'chemistry', 'physics']):
-            if grade_level == 'primary':
-                return 2 if grade_number <= 3 else 3
-            elif grade_level == 'intermediate':
-                return 3
-            else:  # secondary
-                return 4 if any(advanced in subject_name_lower for advanced in ['chemistry', 'physics']) else 3
-        
-        # Social studies and humanities
-        elif any(humanities in subject_name_lower for humanities in ['social', 'history', 'geography', 'civics']):
-            return 3 if grade_level == 'primary' else 2
-        
-        # Languages (other than Arabic and English)
-        elif any(language in subject_name_lower for language in ['french', 'german', 'spanish']):
-            return 3
-        
-        # Arts and physical education
-        elif any(arts in subject_name_lower for arts in ['art', 'music', 'physical', 'sports']):
-            return 2
-        
-        # Religious education
-        elif 'islamic' in subject_name_lower or 'religion' in subject_name_lower:
-            return 2
-        
-        # Default for other subjects
-        else:
-            return 2
+        return _curriculum_periods(subject_name.lower(), grade_level, grade_number)
+    
+    def _get_subject_teacher_index(self) -> Dict[int, List[int]]:
+        """Map subject_id to the IDs of active teachers assigned to it, loaded in one query"""
+        if self._subject_teacher_index is None:
+            rows = self.db.query(TeacherAssignment.subject_id, TeacherAssignment.teacher_id).join(
+                Teacher, Teacher.id == TeacherAssignment.teacher_id
+            ).filter(Teacher.is_active == True).all()
+            
+            # A teacher may hold several sections of the same subject; dict keys
+            # drop the duplicates in O(1) while keeping first-seen order
+            index: Dict[int, Dict[int, None]] = defaultdict(dict)
+            for subject_id, teacher_id in rows:
+                index[subject_id][teacher_id] = None
+            self._subject_teacher_index = {
+                subject_id: list(teacher_ids) for subject_id, teacher_ids in index.items()
+            }
+        return self._subject_teacher_index
     
     def _find_suitable_teachers(self, subject_id: int, teachers: List[Teacher]) -> List[Teacher]:
         """Find teachers suitable for a subject"""
@@ -2552,28 +2795,12 @@ class ScheduleGenerationService:
         
         # Check teacher qualifications/assignments
         try:
-            query = self.db.query(Teacher)
-            if query is not None:
-                # Join with TeacherAssignment
-                try:
-                    joined_query = query.join(TeacherAssignment)
-                    if joined_query is not None:
-                        # Filter by subject
-                        filtered_query = joined_query.filter(
-                            and_(
-                                TeacherAssignment.teacher_id == Teacher.id,
-                                TeacherAssignment.subject_id == subject_id
-                            )
-                        )
-                        if filtered_query is not None:
-                            results = filtered_query.all()
-                            if results is not None:
-                                for assignment in results:
-                                    if hasattr(assignment, 'teacher'):
-                                        suitable_teachers.append(assignment.teacher)
-                except Exception:
-                    # If join fails, fall back to basic query
-                    pass
+            teacher_by_id = {t.id: t for t in teachers}
+            suitable_teachers = [
+                teacher_by_id[tid]
+                for tid in self._get_subject_teacher_index().get(subject_id, [])
+                if tid in teacher_by_id
+            ]
         except Exception:
             pass
         
@@ -2584,29 +2811,30 @@ class ScheduleGenerationService:
         return suitable_teachers
     
     def _select_best_teacher(self, teachers: List[Teacher], time_slot: TimeSlot, 
-                           assignments: List[ScheduleAssignment], request: ScheduleGenerationRequest) -> Optional[Teacher]:
+                           teacher_workloads: Dict[int, int], request: ScheduleGenerationRequest) -> Optional[Teacher]:
         """Select the best teacher for a time slot based on availability, workload, and expertise"""
         if not teachers:
             return None
         
-        # Get current workload for each teacher
-        teacher_workloads = self._calculate_teacher_workloads(assignments)
-        
-        # Get teacher expertise scores
-        teacher_expertise = self._calculate_teacher_expertise(teachers)
+        # Get teacher expertise scores (teacher fields don't change during a run, so score each teacher once)
+        unscored_teachers = [teacher for teacher in teachers if teacher.id not in self._expertise_cache]
+        if unscored_teachers:
+            self._expertise_cache.update(self._calculate_teacher_expertise(unscored_teachers))
+        teacher_expertise = self._expertise_cache
         
         # Get teacher availability for this time slot
-        teacher_availability = self._check_teacher_availability(teachers, time_slot, assignments)
+        teacher_availability = self._check_teacher_availability(teachers, time_slot)
         
-        # Score each teacher based on multiple factors
-        teacher_scores = {}
+        # Score each teacher based on multiple factors, keeping only the best so far
+        max_load = getattr(request, 'max_teacher_load', 25)
+        best_teacher = None
+        best_score = -1.0
         for teacher in teachers:
             if not teacher_availability.get(teacher.id, True):  # Skip if not available
                 continue
                 
             # Workload score (lower workload = higher score)
             workload = teacher_workloads.get(teacher.id, 0)
-            max_load = getattr(request, 'max_teacher_load', 25)
             workload_score = max(0, (max_load - workload) / max_load) if max_load > 0 else 0
             
             # Expertise score
@@ -2622,27 +2850,17 @@ class ScheduleGenerationService:
                 preference_score * 0.2      # 20% preference consideration
             )
             
-            teacher_scores[teacher.id] = {
-                'teacher': teacher,
-                'score': combined_score,
-                'workload': workload,
-                'expertise': expertise_score
-            }
+            # Ties keep the earlier teacher
+            if combined_score > best_score:
+                best_score = combined_score
+                best_teacher = teacher
         
-        # Return teacher with highest score
-        if teacher_scores:
-            best_teacher_id = max(teacher_scores.keys(), key=lambda k: teacher_scores[k]['score'])
-            return teacher_scores[best_teacher_id]['teacher']
-        
-        return None
+        # Return teacher with highest score, or None if nobody is available
+        return best_teacher
     
     def _calculate_teacher_workloads(self, assignments: List[ScheduleAssignment]) -> Dict[int, int]:
         """Calculate current workload for each teacher"""
-        workloads = {}
-        for assignment in assignments:
-            if assignment.teacher_id:
-                workloads[assignment.teacher_id] = workloads.get(assignment.teacher_id, 0) + 1
-        return workloads
+        return Counter(assignment.teacher_id for assignment in assignments if assignment.teacher_id)
     
     def _calculate_teacher_expertise(self, teachers: List[Teacher]) -> Dict[int, float]:
         """Calculate expertise score for each teacher (0.0 to 1.0)"""
@@ -2654,8 +2872,7 @@ class ScheduleGenerationService:
             if hasattr(teacher, 'experience') and teacher.experience:  # type: ignore - Teacher experience check
                 try:
                     # Extract years from experience string (e.g., "5 years teaching experience")
-                    import re
-                    years_match = re.search(r'(\d+)\s*(year|years)', str(teacher.experience).lower())  # type: ignore - Experience years extraction
+                    years_match = _EXPERIENCE_YEARS_RE.search(str(teacher.experience))  # type: ignore - Experience years extraction
                     if years_match:
                         years = int(years_match.group(1))  # type: ignore - Years conversion
                         # Normalize to 0.0-1.0 range (0-20 years = 0.0-1.0)
@@ -2665,18 +2882,13 @@ class ScheduleGenerationService:
             
             # Consider qualifications
             if hasattr(teacher, 'qualifications') and teacher.qualifications:  # type: ignore - Teacher qualifications check
-                qual_score = 0.0
                 qual_text = str(teacher.qualifications).lower()
                 
                 # Higher education degrees
-                if 'phd' in qual_text or 'doctorate' in qual_text:
-                    qual_score = 0.2
-                elif 'master' in qual_text or 'ma' in qual_text or 'ms' in qual_text:
-                    qual_score = 0.15
-                elif 'bachelor' in qual_text or 'ba' in qual_text or 'bs' in qual_text:
-                    qual_score = 0.1
-                elif 'diploma' in qual_text:
-                    qual_score = 0.05
+                qual_score = next(
+                    (degree_score for keyword, degree_score in _QUALIFICATION_SCORES if keyword in qual_text),
+                    0.0
+                )
                 
                 score += min(qual_score, 0.2)  # Max 0.2 from qualifications
             
@@ -2684,14 +2896,12 @@ class ScheduleGenerationService:
         
         return expertise_scores
     
-    def _check_teacher_availability(self, teachers: List[Teacher], time_slot: TimeSlot, 
-                                  assignments: List[ScheduleAssignment]) -> Dict[int, bool]:
+    def _check_teacher_availability(self, teachers: List[Teacher], time_slot: TimeSlot) -> Dict[int, bool]:
         """Check if teachers are available for the given time slot"""
         availability = {}
         
-        # Get existing assignments for this time slot
-        slot_assignments = [a for a in assignments if a.time_slot_id == time_slot.id]
-        assigned_teachers = {a.teacher_id for a in slot_assignments if a.teacher_id}
+        # Teachers already assigned to this time slot, kept up to date as assignments are made
+        assigned_teachers = self._assigned_by_slot.get(time_slot.id, set())
         
         for teacher in teachers:
             # Check if teacher is already assigned to this time slot
@@ -2719,33 +2929,22 @@ class ScheduleGenerationService:
     
     def _find_alternative_teacher(self, assignment: ScheduleAssignment) -> Optional[Teacher]:
         """Find an alternative teacher for an assignment"""
-        # Find teachers who can teach this subject
+        # Find a teacher who can teach this subject and has nothing else at this
+        # time slot, with the busy check done in the same query
+        busy_at_slot = exists().where(
+            ScheduleAssignment.teacher_id == Teacher.id,
+            ScheduleAssignment.time_slot_id == assignment.time_slot_id,
+            ScheduleAssignment.id != assignment.id
+        )
         try:
-            suitable_teachers = self.db.query(Teacher).join(TeacherAssignment).filter( 
+            return self.db.query(Teacher).join(TeacherAssignment).filter( 
                 and_(
                     TeacherAssignment.subject_id == assignment.subject_id,
                     Teacher.is_active == True,
-                    Teacher.id != assignment.teacher_id  # Not the current teacher
+                    Teacher.id != assignment.teacher_id,  # Not the current teacher
+                    ~busy_at_slot
                 )
-            ).all() 
-            
-            # Filter by availability (no conflicts at this time)
-            available_teachers = []
-            for teacher in suitable_teachers:
-                # Check if teacher is already assigned at this time
-                conflict = self.db.query(ScheduleAssignment).filter( 
-                    and_(
-                        ScheduleAssignment.teacher_id == teacher.id,
-                        ScheduleAssignment.time_slot_id == assignment.time_slot_id,
-                        ScheduleAssignment.id != assignment.id
-                    )
-                ).first() 
-                
-                if not conflict:
-                    available_teachers.append(teacher)
-            
-            # Return first available teacher, or None if none found
-            return available_teachers[0] if available_teachers else None
+            ).first()
         except Exception:
             return None
     
@@ -2753,42 +2952,41 @@ class ScheduleGenerationService:
                            from_teacher: int, to_teacher: int) -> bool:
         """Transfer assignment from one teacher to another"""
         try:
-            # Find assignments for the from_teacher
-            teacher_assignments = [a for a in assignments if a.teacher_id == from_teacher]
+            # Find the first assignment of the from_teacher
+            assignment_to_transfer = next((a for a in assignments if a.teacher_id == from_teacher), None)
             
-            if not teacher_assignments:
+            if assignment_to_transfer is None:
                 return False
             
-            # Transfer one assignment to the to_teacher
-            assignment_to_transfer = teacher_assignments[0]
+            # Transfer one assignment to the to_teacher; the instance is already
+            # tracked by this session, so committing persists the change
             assignment_to_transfer.teacher_id = to_teacher
-            
-            # Update in database
-            db_assignment = self.db.query(ScheduleAssignment).filter( 
-                ScheduleAssignment.id == assignment_to_transfer.id
-            ).first() 
-            
-            if db_assignment:
-                db_assignment.teacher_id = to_teacher
-                self.db.commit()
-                return True
-            
-            return False
+            self.db.commit()
+            return True
         except Exception as e:
-            print(f"Failed to transfer assignment: {e}")
+            logger.error("Failed to transfer assignment: %s", e)
             return False
 
-    def _redistribute_subject_periods(self, subject_assignments: List[ScheduleAssignment]) -> bool:
-        """Redistribute subject periods for better continuity"""
+    def _redistribute_subject_periods(self, subject_assignments: List[ScheduleAssignment],
+                                      slot_by_id: Optional[Dict[int, TimeSlot]] = None) -> bool:
+        """Redistribute subject periods for better continuity; True if any period moved
+        
+        slot_by_id may carry the assignments' time slots already loaded by the caller.
+        """
         if len(subject_assignments) <= 1:
-            return True
+            return False
         
+        moved = False
         try:
+            # Load the time slots of all assignments in one query
+            if slot_by_id is None:
+                slot_by_id = self._load_time_slots(subject_assignments)
+            
             # Group assignments by day
             assignments_by_day = {}
             for assignment in subject_assignments:
                 # Get the actual time slot to determine the day
-                time_slot = self.db.query(TimeSlot).filter(TimeSlot.id == assignment.time_slot_id).first() 
+                time_slot = slot_by_id.get(assignment.time_slot_id)
                 if time_slot:
                     day = time_slot.day_of_week
                     if day not in assignments_by_day:
@@ -2815,24 +3013,19 @@ class ScheduleGenerationService:
                             target_time_slots, assignment.class_id, assignment.teacher_id
                         )
                         
-                        if available_slot:
-                            # Update the assignment's time slot
+                        if available_slot and available_slot.id != assignment.time_slot_id:
+                            # Update the assignment's time slot (persisted by the flush below)
                             assignment.time_slot_id = available_slot.id
-                            
-                            # Update in database
-                            db_assignment = self.db.query(ScheduleAssignment).filter( 
-                                ScheduleAssignment.id == assignment.id
-                            ).first() 
-                            
-                            if db_assignment:
-                                db_assignment.time_slot_id = available_slot.id
+                            moved = True
                 
-                # Commit all changes
-                self.db.commit()
+                # Flush so later slot lookups see the moves; the caller commits.
+                # Committing here would expire the caller's preloaded time slots
+                if moved:
+                    self.db.flush()
             
-            return True
+            return moved
         except Exception as e:
-            print(f"Failed to redistribute subject periods: {e}")
+            logger.error("Failed to redistribute subject periods: %s", e)
             return False
     
     def _find_available_time_slot(self, target_time_slots: List[Tuple], class_id: int, teacher_id: Optional[int]) -> Optional[TimeSlot]:
@@ -2845,43 +3038,26 @@ class ScheduleGenerationService:
         if not target_day:
             return None
         
-        # Get all time slots for the target day
-        all_day_slots = self.db.query(TimeSlot).filter(TimeSlot.day_of_week == target_day).all() 
-        
-        # Find slots that are not already occupied by this class or teacher
-        for slot in all_day_slots:
-            # Check if this slot is already used by the same class
-            class_conflict = self.db.query(ScheduleAssignment).filter( 
-                and_(
-                    ScheduleAssignment.class_id == class_id,
-                    ScheduleAssignment.time_slot_id == slot.id
-                )
-            ).first() 
-            
-            if class_conflict:
-                continue
-            
-            # Check if this slot is already used by the same teacher (if teacher is assigned)
-            if teacher_id:
-                teacher_conflict = self.db.query(ScheduleAssignment).filter( 
-                    and_(
-                        ScheduleAssignment.teacher_id == teacher_id,
-                        ScheduleAssignment.time_slot_id == slot.id
-                    )
-                ).first() 
-                
-                if teacher_conflict:
-                    continue
-            
-            # This slot is available
-            return slot
-        
-        return None
+        # Slots already used by the same class, or by the same teacher (if teacher is assigned)
+        occupant = ScheduleAssignment.class_id == class_id
+        if teacher_id:
+            occupant = or_(occupant, ScheduleAssignment.teacher_id == teacher_id)
+        occupied = exists().where(ScheduleAssignment.time_slot_id == TimeSlot.id, occupant)
+        
+        # First time slot on the target day not occupied by this class or teacher,
+        # found by the database in one query
+        return self.db.query(TimeSlot).filter(
+            TimeSlot.day_of_week == target_day,
+            ~occupied
+        ).order_by(TimeSlot.id).first()
     
-    def export_to_json(self, schedule_data: List[Dict]) -> str:
-        """Export schedule data to JSON format"""
-        import json
-        return json.dumps(schedule_data, indent=2, ensure_ascii=False)
+    def export_to_json(self, schedule_data: List[Dict], pretty: bool = False) -> str:
+        """Export schedule data to JSON format (compact unless pretty is set)"""
+        return json.dumps(schedule_data, indent=2 if pretty else None, ensure_ascii=False)
+    
+    def export_to_json_stream(self, schedule_data: List[Dict], fp: IO[str]) -> None:
+        """Write schedule data as JSON straight to a text stream without building the whole string"""
+        json.dump(schedule_data, fp, ensure_ascii=False)
     
     def import_template(self, template_data: Dict) -> Dict:
         """Import schedule template data and validate it"""
@@ -2966,21 +3142,21 @@ class ScheduleGenerationService:
         if not schedule_data:
             return ""
         
-        import csv
-        from io import StringIO
-        
         output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        header = list(schedule_data[0].keys())
-        writer.writerow(header)
+        writer = _schedule_csv_writer(output, schedule_data)
+        writer.writeheader()
+        writer.writerows(schedule_data)
+        return output.getvalue()
+    
+    def export_to_csv_iter(self, schedule_data: List[Dict]) -> Iterator[str]:
+        """Yield schedule data as CSV one line at a time (e.g. for a StreamingResponse)"""
+        if not schedule_data:
+            return
         
-        # Write data rows
+        writer = _schedule_csv_writer(_EchoWriter(), schedule_data)
+        yield writer.writeheader()
         for item in schedule_data:
-            writer.writerow([item.get(key, "") for key in header])
-        
-        return output.getvalue()
+            yield writer.writerow(item)
 
 class ScheduleAnalyticsService:
     """Service for schedule analytics and statistics"""
@@ -3002,81 +3178,75 @@ class ScheduleAnalyticsService:
             ScheduleConflict.schedule_id == schedule_id
         ).all() 
         
-        # Calculate statistics
-        total_periods = len([slot for slot in time_slots if not slot.is_break])
-        total_assignments = len(assignments)
-        total_breaks = len([slot for slot in time_slots if slot.is_break])
+        # Calculate statistics in one pass over time slots and one over assignments
+        total_periods = 0
+        total_breaks = 0
+        daily_distribution = Counter()
+        for slot in time_slots:
+            if slot.is_break:
+                total_breaks += 1
+            else:
+                total_periods += 1
+                daily_distribution[slot.day_of_week] += 1
         
-        # Teacher utilization
-        teacher_periods = {}
+        total_assignments = len(assignments)
+        teacher_periods = Counter()
+        subject_distribution = Counter()
+        class_load = Counter()
         for assignment in assignments:
             if assignment.teacher_id:
-                teacher_periods[assignment.teacher_id] = teacher_periods.get(assignment.teacher_id, 0) + 1
+                teacher_periods[assignment.teacher_id] += 1
+            subject_distribution[f"Subject_{assignment.subject_id}"] += 1
+            class_load[f"Class_{assignment.class_id}"] += 1
         
+        # Teacher utilization
         teacher_utilization = {}
         for teacher_id, periods in teacher_periods.items():
             utilization = (periods / total_periods) * 100 if total_periods > 0 else 0
             teacher_utilization[f"Teacher_{teacher_id}"] = round(utilization, 2)
         
-        # Subject distribution
-        subject_distribution = {}
-        for assignment in assignments:
-            subject_key = f"Subject_{assignment.subject_id}"
-            subject_distribution[subject_key] = subject_distribution.get(subject_key, 0) + 1
-        
-        # Class load
-        class_load = {}
-        for assignment in assignments:
-            class_key = f"Class_{assignment.class_id}"
-            class_load[class_key] = class_load.get(class_key, 0) + 1
-        
-        # Daily distribution
-        daily_distribution = {}
-        for slot in time_slots:
-            if not slot.is_break:
-                daily_distribution[slot.day_of_week] = daily_distribution.get(slot.day_of_week, 0) + 1
-        
         # Conflicts summary
-        conflicts_summary = {}
-        for conflict in conflicts:
-            conflicts_summary[conflict.conflict_type] = conflicts_summary.get(conflict.conflict_type, 0) + 1
+        conflicts_summary = Counter(conflict.conflict_type for conflict in conflicts)
         
         return ScheduleStatistics(
             total_periods=total_periods,
             total_assignments=total_assignments,
             total_breaks=total_breaks,
             teacher_utilization=teacher_utilization,
-            subject_distribution=subject_distribution,
-            class_load=class_load,
-            daily_distribution=daily_distribution,
-            conflicts_summary=conflicts_summary
+            subject_distribution=dict(subject_distribution),
+            class_load=dict(class_load),
+            daily_distribution=dict(daily_distribution),
+            conflicts_summary=dict(conflicts_summary)
         )
     
-    def export_to_json(self, schedule_data: List[Dict]) -> str:
-        """Export schedule data to JSON format"""
-        import json
-        return json.dumps(schedule_data, indent=2, ensure_ascii=False)
+    def export_to_json(self, schedule_data: List[Dict], pretty: bool = False) -> str:
+        """Export schedule data to JSON format (compact unless pretty is set)"""
+        return json.dumps(schedule_data, indent=2 if pretty else None, ensure_ascii=False)
+    
+    def export_to_json_stream(self, schedule_data: List[Dict], fp: IO[str]) -> None:
+        """Write schedule data as JSON straight to a text stream without building the whole string"""
+        json.dump(schedule_data, fp, ensure_ascii=False)
     
     def export_to_csv(self, schedule_data: List[Dict]) -> str:
         """Export schedule data to CSV format"""
         if not schedule_data:
             return ""
         
-        import csv
-        from io import StringIO
-        
         output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        header = list(schedule_data[0].keys())
-        writer.writerow(header)
+        writer = _schedule_csv_writer(output, schedule_data)
+        writer.writeheader()
+        writer.writerows(schedule_data)
+        return output.getvalue()
+    
+    def export_to_csv_iter(self, schedule_data: List[Dict]) -> Iterator[str]:
+        """Yield schedule data as CSV one line at a time (e.g. for a StreamingResponse)"""
+        if not schedule_data:
+            return
         
-        # Write data rows
+        writer = _schedule_csv_writer(_EchoWriter(), schedule_data)
+        yield writer.writeheader()
         for item in schedule_data:
-            writer.writerow([item.get(key, "") for key in header])
-        
-        return output.getvalue()
+            yield writer.writerow(item)
     
     def import_template(self, template_data: Dict) -> Dict:
         """Import schedule template data"""
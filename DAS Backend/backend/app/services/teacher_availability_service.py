@@ -4,7 +4,8 @@ Manages automatic updates to teacher free_time_slots when schedules are created/
 """
 
 import json
-from typing import Dict, List, Optional, Any
+from collections import defaultdict
+from typing import Dict, List, Optional, Any, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
@@ -35,9 +36,28 @@ class TeacherAvailabilityService:
         if not teacher:
             raise ValueError(f"Teacher with ID {teacher_id} not found")
         
+        return self._summarize_slots(teacher.free_time_slots)
+    
+    def get_teacher_availability_bulk(self, teacher_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Get several teachers' availability with one query
+        
+        Returns:
+            Dict of teacher_id -> the structure get_teacher_availability returns;
+            unknown teacher IDs are left out
+        """
+        if not teacher_ids:
+            return {}
+        rows = self.db.query(Teacher.id, Teacher.free_time_slots).filter(
+            Teacher.id.in_(set(teacher_ids))
+        ).all()
+        return {teacher_id: self._summarize_slots(free_time_slots) for teacher_id, free_time_slots in rows}
+    
+    def _summarize_slots(self, free_time_slots: Optional[str]) -> Dict[str, Any]:
+        """Parse a free_time_slots JSON value and count its slot statuses"""
         # Parse free_time_slots JSON
         try:
-            slots_data = json.loads(teacher.free_time_slots) if teacher.free_time_slots else []
+            slots_data = json.loads(free_time_slots) if free_time_slots else []
         except (json.JSONDecodeError, TypeError):
             slots_data = []
         
@@ -130,6 +150,85 @@ class TeacherAvailabilityService:
         
         return False
     
+    def mark_slots_bulk(
+        self,
+        marks: List[Tuple],
+        schedule_id: Optional[int] = None
+    ) -> int:
+        """
+        Mark many time slots as assigned, updating each teacher once
+        
+        Same slot update as mark_slot_as_assigned, but teachers, subjects and
+        classes are loaded with one query each and everything is committed once.
+        
+        Args:
+            marks: (teacher_id, day, period, subject_id, class_id, section[, schedule_id])
+                tuples, day and period 0-based
+            schedule_id: Associated schedule ID for marks that don't carry their own
+            
+        Returns:
+            Number of slots marked
+        """
+        return sum(self._apply_slot_marks(marks, schedule_id))
+    
+    def _apply_slot_marks(self, marks: List[Tuple], schedule_id: Optional[int] = None) -> List[bool]:
+        """Apply mark_slots_bulk's updates and report, per mark, whether it was applied"""
+        applied = [False] * len(marks)
+        marks_by_teacher = defaultdict(list)
+        for index, mark in enumerate(marks):
+            marks_by_teacher[mark[0]].append((index, mark))
+        if not marks_by_teacher:
+            return applied
+        
+        teachers = self.db.query(Teacher).filter(Teacher.id.in_(marks_by_teacher)).all()
+        subject_names = dict(
+            self.db.query(Subject.id, Subject.subject_name).filter(
+                Subject.id.in_({mark[3] for mark in marks})
+            ).all()
+        )
+        class_names = {
+            class_obj.id: self._get_class_display_name(class_obj)
+            for class_obj in self.db.query(Class).filter(Class.id.in_({mark[4] for mark in marks})).all()
+        }
+        
+        for teacher in teachers:
+            try:
+                slots_data = json.loads(teacher.free_time_slots) if teacher.free_time_slots else []
+            except (json.JSONDecodeError, TypeError):
+                slots_data = []
+            
+            if not slots_data:
+                slots_data = self._initialize_empty_slots()
+            
+            teacher_marked = 0
+            for index, mark in marks_by_teacher[teacher.id]:
+                _, day, period, subject_id, class_id, section = mark[:6]
+                mark_schedule_id = mark[6] if len(mark) > 6 else schedule_id
+                slot_index = day * 6 + period
+                if 0 <= slot_index < len(slots_data):
+                    slots_data[slot_index].update({
+                        "day": day,
+                        "period": period,
+                        "status": "assigned",
+                        "is_free": False,
+                        "assignment": {
+                            "subject_id": subject_id,
+                            "subject_name": subject_names.get(subject_id, "Unknown"),
+                            "class_id": class_id,
+                            "class_name": class_names.get(class_id, "Unknown"),
+                            "section": section,
+                            "schedule_id": mark_schedule_id
+                        }
+                    })
+                    applied[index] = True
+                    teacher_marked += 1
+            
+            if teacher_marked:
+                teacher.free_time_slots = json.dumps(slots_data)
+        
+        self.db.commit()
+        return applied
+    
     def mark_slot_as_free(self, teacher_id: int, day: int, period: int) -> bool:
         """
         Mark a specific time slot as free (remove assignment)
@@ -197,33 +296,39 @@ class TeacherAvailabilityService:
         updated_teachers = []
         errors = []
         
+        # Time slots of all assignments in one query
+        from ..models.schedules import TimeSlot
+        time_slot_ids = {a.time_slot_id for a in assignments if a.teacher_id and a.time_slot_id}
+        slot_by_id = {
+            time_slot.id: time_slot
+            for time_slot in self.db.query(TimeSlot).filter(TimeSlot.id.in_(time_slot_ids)).all()
+        } if time_slot_ids else {}
+        
+        # Collect every slot update, then write each teacher's slots once
+        marks = []
         for assignment in assignments:
-            if not assignment.teacher_id:
+            if not assignment.teacher_id or not assignment.time_slot_id:
                 continue
-            
-            # Get the time slot info
-            if assignment.time_slot_id:
-                from ..models.schedules import TimeSlot
-                time_slot = self.db.query(TimeSlot).filter(TimeSlot.id == assignment.time_slot_id).first()
-                if time_slot:
-                    day = time_slot.day_of_week - 1  # Convert 1-7 to 0-6
-                    period = time_slot.period_number - 1  # Convert 1-based to 0-based
-                    
-                    success = self.mark_slot_as_assigned(
-                        teacher_id=assignment.teacher_id,
-                        day=day,
-                        period=period,
-                        subject_id=assignment.subject_id,
-                        class_id=assignment.class_id,
-                        section=schedule.section,
-                        schedule_id=schedule_id
-                    )
-                    
-                    if success:
-                        if assignment.teacher_id not in updated_teachers:
-                            updated_teachers.append(assignment.teacher_id)
-                    else:
-                        errors.append(f"Failed to update teacher {assignment.teacher_id}")
+            time_slot = slot_by_id.get(assignment.time_slot_id)
+            if time_slot:
+                marks.append((
+                    assignment.teacher_id,
+                    time_slot.day_of_week - 1,  # Convert 1-7 to 0-6
+                    time_slot.period_number - 1,  # Convert 1-based to 0-based
+                    assignment.subject_id,
+                    assignment.class_id,
+                    schedule.section
+                ))
+        
+        updated_ids = set()
+        for mark, success in zip(marks, self._apply_slot_marks(marks, schedule_id)):
+            teacher_id = mark[0]
+            if success:
+                if teacher_id not in updated_ids:
+                    updated_ids.add(teacher_id)
+                    updated_teachers.append(teacher_id)
+            else:
+                errors.append(f"Failed to update teacher {teacher_id}")
         
         return {
             "success": True,
@@ -248,6 +353,7 @@ class TeacherAvailabilityService:
         ).all()
         
         restored_teachers = []
+        restored_ids = set()
         errors = []
         
         for assignment in assignments:
@@ -269,7 +375,8 @@ class TeacherAvailabilityService:
                     )
                     
                     if success:
-                        if assignment.teacher_id not in restored_teachers:
+                        if assignment.teacher_id not in restored_ids:
+                            restored_ids.add(assignment.teacher_id)
                             restored_teachers.append(assignment.teacher_id)
                     else:
                         errors.append(f"Failed to restore teacher {assignment.teacher_id}")
@@ -2,6 +2,8 @@ import asyncio
 import aiohttp
 import json
 import logging
+import threading
+from concurrent.futures import Future
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from enum import Enum
@@ -35,6 +37,22 @@ class TelegramNotificationService:
         
         if not self.enabled:
             logger.warning("Telegram notifications disabled: missing bot token or chat ID")
+        
+        # Background event loop for notifications fired from synchronous code
+        self._dispatch_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatch_lock = threading.Lock()
+    
+    def dispatch(self, coro) -> Future:
+        """Run a notification coroutine on a shared background loop without blocking the caller"""
+        with self._dispatch_lock:
+            if self._dispatch_loop is None:
+                self._dispatch_loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._dispatch_loop.run_forever,
+                    name="telegram-dispatch",
+                    daemon=True
+                ).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._dispatch_loop)
     
     async def send_message(self, message: str, message_type: MessageType = MessageType.INFO,
                           parse_mode: str = "HTML", disable_notification: bool = False) -> Dict[str, Any]:
@@ -3,6 +3,7 @@ Validation Service for Schedule Prerequisites
 Checks teacher availability sufficiency and other prerequisites before schedule generation
 """
 
+from itertools import chain
 from typing import Dict, List, Any, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
@@ -105,26 +106,39 @@ class ValidationService:
         teacher_info_map = {}  # teacher_id -> teacher object
         subject_assignment_map = {}  # subject_id -> (teacher, assignment)
         
+        # Load the class's assignments and their teachers once, keeping the first
+        # assignment per subject for the requested section and for "all sections"
+        section_assignments = {}  # subject_id -> assignment for this section
+        general_assignments = {}  # subject_id -> assignment with no section
+        for assignment in self.db.query(TeacherAssignment).filter(
+            TeacherAssignment.class_id == class_id
+        ).order_by(TeacherAssignment.id).all():
+            if section and assignment.section == section:
+                section_assignments.setdefault(assignment.subject_id, assignment)
+            elif assignment.section is None or assignment.section == '':
+                general_assignments.setdefault(assignment.subject_id, assignment)
+        
+        assigned_teacher_ids = {
+            assignment.teacher_id
+            for assignment in chain(section_assignments.values(), general_assignments.values())
+        }
+        teachers_by_id = {
+            teacher.id: teacher
+            for teacher in self.db.query(Teacher).filter(Teacher.id.in_(assigned_teacher_ids)).all()
+        } if assigned_teacher_ids else {}
+        
         for subject in subjects:
             # Get teacher assignment for this subject
             assignment = None
             
             if section:
                 # Look for section-specific assignment first
-                assignment = self.db.query(TeacherAssignment).filter(
-                    TeacherAssignment.class_id == class_id,
-                    TeacherAssignment.subject_id == subject.id,
-                    TeacherAssignment.section == section
-                ).first()
+                assignment = section_assignments.get(subject.id)
             
             # If no section-specific assignment found (or no section provided), 
             # look for a general assignment (section is NULL or empty)
             if not assignment:
-                assignment = self.db.query(TeacherAssignment).filter(
-                    TeacherAssignment.class_id == class_id,
-                    TeacherAssignment.subject_id == subject.id,
-                    (TeacherAssignment.section == None) | (TeacherAssignment.section == '')
-                ).first()
+                assignment = general_assignments.get(subject.id)
             
             if not assignment:
                 unassigned_subjects.append(subject.subject_name)
@@ -139,9 +153,7 @@ class ValidationService:
                 continue
             
             # Check teacher exists
-            teacher = self.db.query(Teacher).filter(
-                Teacher.id == assignment.teacher_id
-            ).first()
+            teacher = teachers_by_id.get(assignment.teacher_id)
             
             if not teacher:
                 unassigned_subjects.append(subject.subject_name)
@@ -198,6 +210,9 @@ class ValidationService:
                     "available": availability_check["available_slots"]
                 })
         
+        # Every teacher's slot availability, read once for the checks below
+        availability_by_teacher = self.availability_service.get_teacher_availability_bulk(list(teacher_info_map))
+        
         # Third pass: Build subject details with corrected availability info
         for subject in subjects:
             if subject.id not in subject_assignment_map:
@@ -207,7 +222,7 @@ class ValidationService:
             teacher_avail = teacher_availability_cache.get(teacher.id, {})
             
             # Check if teacher has free slots for specific time periods
-            teacher_free_slots = self.availability_service.get_teacher_availability(teacher.id)
+            teacher_free_slots = availability_by_teacher[teacher.id]
             missing_timeslots = []
             
             # Check each day and period to find if teacher is available
@@ -249,7 +264,7 @@ class ValidationService:
         teachers_without_freetime = []
         for teacher_id in teacher_info_map.keys():
             teacher = teacher_info_map[teacher_id]
-            teacher_free_slots = self.availability_service.get_teacher_availability(teacher_id)
+            teacher_free_slots = availability_by_teacher[teacher_id]
             if teacher_free_slots["total_free"] == 0:
                 teachers_without_freetime.append(teacher.full_name)
         
@@ -308,7 +323,7 @@ class ValidationService:
                 has_free_teacher = False
                 
                 for teacher_id in teacher_info_map.keys():
-                    teacher_avail = self.availability_service.get_teacher_availability(teacher_id)
+                    teacher_avail = availability_by_teacher[teacher_id]
                     slot_index = day * periods_per_day + period
                     
                     if slot_index < len(teacher_avail["slots"]):
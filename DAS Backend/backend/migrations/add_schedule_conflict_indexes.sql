@@ -0,0 +1,16 @@
+-- Migration: Add composite indexes for schedule conflict detection
+-- Date: 2026-10-18
+-- Description: Index time slots by (schedule, day, period) and schedule assignments
+-- by (teacher, time slot) and (room, time slot) for double-booking checks
+
+-- 1. Time slots looked up by schedule and day/period
+CREATE INDEX IF NOT EXISTS ix_timeslot_schedule_day_period
+ON time_slots (schedule_id, day_of_week, period_number);
+
+-- 2. Teacher double-booking checks
+CREATE INDEX IF NOT EXISTS ix_assignment_teacher_slot
+ON schedule_assignments (teacher_id, time_slot_id);
+
+-- 3. Room double-booking checks
+CREATE INDEX IF NOT EXISTS ix_assignment_room_slot
+ON schedule_assignments (room, time_slot_id);